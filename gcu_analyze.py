@@ -0,0 +1,304 @@
+import os
+import csv
+import sys
+import glob
+import json
+import warnings
+import numpy as np
+
+ANALYZE_VERSION = 1
+CACHE_NAME = '.gcu_analyze_cache.json'
+TIMING_FIELDS = ('timing_sum', 't_recv', 't_chamb')
+ERROR_STATE = 10
+CURR_BIN = 0.01              # A per linear current histogram bin
+
+def iter_gcul(path, chunk_records=1 << 18):
+    from gcu_logger import iter_records
+    for meta, rec in iter_records(path, chunk_records):
+        yield {name: rec[name] for name in rec.dtype.names}, rec['t_mono']
+
+def csv_columns(header):
+    cols = []
+    for name in header:
+        if name == 'pc_time': cols += ['pc_h', 'pc_m', 'pc_s']
+        else: cols.append(name)
+    return cols
+
+def parse_csv_block(block, cols, header):
+    # Booleans become 0/1 and pc_time HH:MM:SS.ffffff becomes three numeric columns, so the whole
+    # block parses in one np.fromstring call. Blocks with a malformed line fall back to csv.
+    text = block.replace(b'False', b'0').replace(b'True', b'1').replace(b':', b',').replace(b'\r', b'')
+    lines = text.count(b'\n')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        flat = np.fromstring(text.replace(b'\n', b','), dtype=np.float64, sep=',')
+    if len(flat) == lines * len(cols): return flat.reshape(lines, len(cols))
+    rows = []
+    for row in csv.reader(block.decode(errors='replace').splitlines()):
+        if len(row) != len(header): continue
+        vals = []
+        try:
+            for name, v in zip(header, row):
+                if name == 'pc_time': vals += [float(x) for x in v.split(':')]
+                elif v in ('True', 'False'): vals.append(float(v == 'True'))
+                else: vals.append(float(v))
+        except ValueError: continue
+        if len(vals) == len(cols): rows.append(vals)
+    return np.array(rows, dtype=np.float64).reshape(-1, len(cols))
+
+def iter_csv(path, chunk_bytes=16 << 20):
+    with open(path, 'rb') as f:
+        header = f.readline().decode().strip().split(',')
+        if not header or header[0] == '': return
+        cols = csv_columns(header)
+        day, last_s, tail = 0.0, None, b''
+        while True:
+            data = f.read(chunk_bytes)
+            if data:
+                data = tail + data
+                cut = data.rfind(b'\n') + 1
+                block, tail = data[:cut], data[cut:]
+                if not block: continue
+            else:
+                block, tail = tail + b'\n', b''
+                if not block.strip(): break
+            a = parse_csv_block(block, cols, header)
+            if not len(a): continue
+            out = {name: a[:, i] for i, name in enumerate(cols)}
+            if 'timeout' in out:
+                keep = out.pop('timeout') == 0
+                out = {k: v[keep] for k, v in out.items()}
+            if 't_mono' in out: t = out['t_mono']
+            elif 'pc_h' in out:
+                secs = out['pc_h'] * 3600 + out['pc_m'] * 60 + out['pc_s']
+                if not len(secs): continue
+                wraps = np.diff(np.r_[secs[0] if last_s is None else last_s, secs]) < -43200
+                t = secs + day + np.cumsum(wraps) * 86400.0
+                day += wraps.sum() * 86400.0; last_s = secs[-1]
+            else: t = np.arange(len(a), dtype=np.float64)
+            yield out, t
+
+def iter_chunks(path):
+    return iter_gcul(path) if path.endswith('.gcul') else iter_csv(path)
+
+# Log-linear bins: exact below 1024 units, then 512 sub-bins per power of two (<0.2% error),
+# so percentiles stay mergeable across chunks whatever the value range.
+LIN_BINS = 1024
+SUB_BINS = 512
+OCTAVES = 32
+
+class ValueHist:
+    def __init__(self, width=1.0):
+        self.counts = np.zeros(LIN_BINS + OCTAVES * SUB_BINS, np.int64)
+        self.width = width
+        self.n = 0
+        self.total = 0.0
+        self.sumsq = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def index(self, v):
+        x = np.maximum(v / self.width, 0.0)
+        e = np.clip(np.floor(np.log2(np.maximum(x, 1.0))), 10, 10 + OCTAVES - 1)
+        log_idx = LIN_BINS + (e - 10) * SUB_BINS + np.minimum(np.floor((x / 2.0 ** e - 1.0) * SUB_BINS), SUB_BINS - 1)
+        return np.where(x < LIN_BINS, np.floor(x), log_idx).astype(np.int64)
+
+    def lower(self, i):
+        if i < LIN_BINS: return i * self.width
+        e, m = divmod(i - LIN_BINS, SUB_BINS)
+        return 2.0 ** (e + 10) * (1.0 + m / SUB_BINS) * self.width
+
+    def add(self, v):
+        if not len(v): return
+        v = np.asarray(v, dtype=np.float64)
+        self.counts += np.bincount(self.index(v), minlength=len(self.counts))
+        self.n += len(v); self.total += v.sum(); self.sumsq += (v * v).sum()
+        self.min = min(self.min, v.min()); self.max = max(self.max, v.max())
+
+    def percentile(self, q):
+        if not self.n: return None
+        i = int(np.searchsorted(np.cumsum(self.counts), q * self.n))
+        return min(max(self.lower(i), self.min), self.max)
+
+    def summary(self):
+        if not self.n: return {'count': 0}
+        mean = self.total / self.n
+        return {'count': self.n, 'min': self.min, 'max': self.max, 'mean': mean,
+                'std': max(0.0, self.sumsq / self.n - mean * mean) ** 0.5,
+                'p50': self.percentile(0.50), 'p90': self.percentile(0.90), 'p99': self.percentile(0.99)}
+
+class SessionStats:
+    def __init__(self, curr_threshold=10.0):
+        self.rows = 0
+        self.t0 = None
+        self.t1 = None
+        self.timings = {name: ValueHist() for name in TIMING_FIELDS}
+        self.curr = ValueHist(CURR_BIN)
+        self.curr_threshold = curr_threshold
+        self.curr_peak = float('-inf')
+        self.curr_peak_t = None
+        self.over_curr = 0
+        self.miss_total = 0
+        self.miss_events = 0
+        self.miss_resets = 0
+        self.transitions = {}
+        self.dwell = {}
+        self.prev = None            # last row of the previous chunk: state, count_miss, timings, over threshold
+        self.err_entry = None
+
+    def update(self, cols, t):
+        n = len(t)
+        if not n: return
+        if self.t0 is None: self.t0 = float(t[0])
+        self.t1 = float(t[-1])
+        self.rows += n
+        first = self.prev
+        st = np.asarray(cols['state'], dtype=np.int64)
+        prev_st = np.r_[first['state'] if first else st[0], st[:-1]]
+
+        for name in TIMING_FIELDS:
+            v = np.asarray(cols[name], dtype=np.float64)
+            prev_v = np.r_[first[name] if first else np.nan, v[:-1]]
+            self.timings[name].add(v[v != prev_v])      # one value per reported cycle, not per frame
+
+        miss = np.asarray(cols['count_miss'], dtype=np.int64)
+        d = np.diff(np.r_[first['count_miss'] if first else miss[0], miss])
+        self.miss_total += int(d[d > 0].sum()); self.miss_events += int((d > 0).sum())
+        resets = d < 0
+        self.miss_resets += int(resets.sum()); self.miss_total += int(miss[resets].sum())
+
+        if self.err_entry is None and not first and st[0] >= ERROR_STATE: self.err_entry = float(t[0])
+        ch = np.flatnonzero(st != prev_st)
+        if len(ch):
+            keys, counts = np.unique(prev_st[ch] * 256 + st[ch], return_counts=True)
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                key = f"{k >> 8}->{k & 0xFF}"
+                self.transitions[key] = self.transitions.get(key, 0) + c
+        for i in ch.tolist():
+            a, b = int(prev_st[i]), int(st[i])
+            if a >= ERROR_STATE and self.err_entry is not None: self.close_dwell(a, float(t[i]))
+            if b >= ERROR_STATE: self.err_entry = float(t[i])
+
+        curr = np.asarray(cols['curr'], dtype=np.float64)
+        self.curr.add(np.abs(curr))
+        i = int(np.argmax(curr))
+        if curr[i] > self.curr_peak: self.curr_peak, self.curr_peak_t = float(curr[i]), float(t[i]) - self.t0
+        over = curr >= self.curr_threshold
+        self.over_curr += int((over & ~np.r_[first['over'] if first else False, over[:-1]]).sum())
+
+        self.prev = {'state': int(st[-1]), 'count_miss': int(miss[-1]), 'over': bool(over[-1]),
+                     **{name: float(cols[name][-1]) for name in TIMING_FIELDS}}
+
+    def close_dwell(self, state, t):
+        d = self.dwell.setdefault(str(state), {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+        dt = max(0.0, t - self.err_entry)
+        d['count'] += 1; d['total_s'] += dt; d['max_s'] = max(d['max_s'], dt)
+        self.err_entry = None
+
+    def result(self):
+        if self.prev and self.prev['state'] >= ERROR_STATE and self.err_entry is not None:
+            self.close_dwell(self.prev['state'], self.t1)
+        return {'rows': self.rows, 'duration_s': (self.t1 - self.t0) if self.rows else 0.0,
+                'timings': {name: h.summary() for name, h in self.timings.items()},
+                'count_miss': {'increase': self.miss_total, 'events': self.miss_events, 'resets': self.miss_resets},
+                'transitions': dict(sorted(self.transitions.items(), key=lambda kv: -kv[1])),
+                'error_dwell': self.dwell,
+                'curr': dict(self.curr.summary(), peak=self.curr_peak if self.rows else None, peak_t=self.curr_peak_t, threshold=self.curr_threshold,
+                             over_threshold_events=self.over_curr)}
+
+def analyze_file(path, curr_threshold=10.0):
+    stats = SessionStats(curr_threshold)
+    try:
+        for cols, t in iter_chunks(path):
+            missing = [k for k in ('state', 'curr', 'count_miss') + TIMING_FIELDS if k not in cols]
+            if missing: raise ValueError(f"missing columns {missing}")
+            stats.update(cols, t)
+    except (OSError, ValueError) as e:
+        return {'file': path, 'error': str(e)}
+    return dict(stats.result(), file=path)
+
+def file_key(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def expand(paths):
+    out = []
+    for p in paths:
+        if os.path.isdir(p): out += sorted(glob.glob(os.path.join(p, 'log_*.csv')) + glob.glob(os.path.join(p, 'log_*.gcul')))
+        else: out.append(p)
+    return out
+
+def load_cache(path):
+    try:
+        with open(path) as f: cache = json.load(f)
+        if cache.get('version') == ANALYZE_VERSION: return cache
+    except (OSError, ValueError): pass
+    return {'version': ANALYZE_VERSION, 'files': {}}
+
+def analyze(paths, jobs=None, cache_path=None, curr_threshold=10.0):
+    files = expand(paths)
+    cache = load_cache(cache_path) if cache_path else {'version': ANALYZE_VERSION, 'files': {}}
+    results, todo, missing = {}, [], 0
+    for p in files:
+        try: key = file_key(p)
+        except OSError as e: results[p] = {'file': p, 'error': str(e)}; missing += 1; continue
+        ent = cache['files'].get(os.path.abspath(p))
+        if ent and ent['key'] == key and ent.get('threshold') == curr_threshold: results[p] = ent['summary']
+        else: todo.append(p)
+    if todo:
+        if jobs == 1 or len(todo) == 1: done = [analyze_file(p, curr_threshold) for p in todo]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(jobs) as ex: done = list(ex.map(analyze_file, todo, [curr_threshold] * len(todo)))
+        for p, res in zip(todo, done):
+            results[p] = res
+            if 'error' not in res:
+                cache['files'][os.path.abspath(p)] = {'key': file_key(p), 'threshold': curr_threshold, 'summary': res}
+        if cache_path:
+            tmp = cache_path + '.tmp'
+            with open(tmp, 'w') as f: json.dump(cache, f)
+            os.replace(tmp, cache_path)
+    return [results[p] for p in files], len(todo), len(files) - len(todo) - missing
+
+def format_summary(res):
+    if 'error' in res: return f"{res['file']}: ERROR {res['error']}"
+    lines = [f"{res['file']}: {res['rows']} rows, {res['duration_s']:.1f} s"]
+    for name, h in res['timings'].items():
+        if h['count']:
+            lines.append(f"  {name:<11} n={h['count']:<8} mean {h['mean']:8.1f}  p50 {h['p50']:6.0f}  p99 {h['p99']:6.0f}  "
+                         f"max {h['max']:6.0f}")
+    m = res['count_miss']
+    lines.append(f"  count_miss  +{m['increase']} in {m['events']} steps, {m['resets']} resets")
+    c = res['curr']
+    if c['count']:
+        lines.append(f"  curr        max {c['peak']:.2f} A at +{c['peak_t']:.3f} s  p99 {c['p99']:.1f} A  "
+                     f">= {c['threshold']:g} A: {c['over_threshold_events']}x")
+    top = list(res['transitions'].items())[:8]
+    if top: lines.append("  transitions " + ", ".join(f"{k}:{v}" for k, v in top))
+    for st, d in res['error_dwell'].items():
+        lines.append(f"  error {st:<5} {d['count']}x, total {d['total_s']:.3f} s, max {d['max_s']:.3f} s")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    ap = argparse.ArgumentParser(description="Summarise GCU telemetry logs (.csv and .gcul)")
+    ap.add_argument('paths', nargs='+', help="log files or directories")
+    ap.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument('--cache', default=None, help=f"summary cache file (default: {CACHE_NAME} next to the first path)")
+    ap.add_argument('--no-cache', action='store_true')
+    ap.add_argument('--curr-threshold', type=float, default=10.0, help="over-current event threshold in A")
+    ap.add_argument('--json', action='store_true', help="print summaries as JSON")
+    args = ap.parse_args()
+    cache = None
+    if not args.no_cache:
+        first = args.paths[0]
+        cache = args.cache or os.path.join(first if os.path.isdir(first) else os.path.dirname(first) or '.', CACHE_NAME)
+    t0 = time.perf_counter()
+    results, processed, cached = analyze(args.paths, args.jobs, cache, args.curr_threshold)
+    if args.json: print(json.dumps(results, indent=1))
+    else:
+        for res in results: print(format_summary(res))
+    failed = sum('error' in r for r in results)
+    print(f"{len(results)} files, {processed} analysed, {cached} cached, {failed} failed, "
+          f"{time.perf_counter() - t0:.2f} s", file=sys.stderr)
@@ -0,0 +1,282 @@
+import os
+import gc
+import sys
+import csv
+import json
+import time
+import struct
+import random
+import subprocess
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+from gcu_crc import crc16, crc16_bitwise, crc16_table
+from gcu_protocol import (TLM_HEADER, PACKET_SIZE, PAYLOAD_SIZE, TLM_STRUCT, TLM_FIELDS, FrameDecoder,
+                          TelemetryBatch, decode_frames)
+from gcu_sim import SimulatedDevice
+
+STREAMS = {
+    'clean': {},
+    'noisy': {'noise': 0.05, 'drop': 0.01, 'crc_error': 0.02},
+    'misaligned': {'noise': 0.01},
+}
+
+def make_stream(kind, frames, seed=1):
+    data = SimulatedDevice(seed=seed, **STREAMS[kind]).generate(frames)
+    if kind == 'misaligned':
+        rng = random.Random(seed)
+        data = bytes(rng.randrange(256) for _ in range(PACKET_SIZE // 2 + 3)) + data
+    return data
+
+def load_recording(path):
+    from gcu_replay import iter_recording
+    return b''.join(chunk for _, chunk in iter_recording(path))
+
+def split_chunks(data, seed=1, lo=1, hi=512):
+    rng, out, pos = random.Random(seed), [], 0
+    while pos < len(data):
+        n = rng.randrange(lo, hi); out.append(data[pos:pos + n]); pos += n
+    return out
+
+# Pre-optimisation hot paths, kept verbatim for comparison.
+def legacy_resync(chunks):
+    rx_buffer, n = bytearray(), 0
+    for chunk in chunks:
+        rx_buffer.extend(chunk)
+        while len(rx_buffer) >= PACKET_SIZE:
+            try: idx = rx_buffer.index(TLM_HEADER)
+            except ValueError: rx_buffer = bytearray(); break
+            if idx > 0: del rx_buffer[:idx]; continue
+            raw_pkt = rx_buffer[:PACKET_SIZE]
+            payload = raw_pkt[:-2]
+            if crc16_bitwise(payload) == struct.unpack('<H', raw_pkt[-2:])[0]:
+                n += 1; del rx_buffer[:PACKET_SIZE]
+            else: del rx_buffer[0:1]
+    return n
+
+def legacy_parse(payload):
+    val = struct.unpack('<BBBHHfIIIIBBBBIIIIBBBBBHHIIH', payload)
+    return dict(zip(('timeout',) + TLM_FIELDS, (False,) + val))
+
+class Stage:
+    def __init__(self, name, units, fn, setup=None, teardown=None):
+        self.name = name
+        self.units = units
+        self.fn = fn
+        self.setup = setup
+        self.teardown = teardown
+
+    def run_once(self):
+        if self.setup: self.setup()
+        fn, clock, lat, frames = self.fn, time.perf_counter_ns, [], 0
+        t0 = clock()
+        for unit in self.units:
+            t = clock(); n = fn(unit); dt = clock() - t
+            if n: lat.append(dt / n); frames += n
+        total = clock() - t0
+        if self.teardown: self.teardown()
+        return frames, total, lat
+
+    def measure(self, repeat):
+        best, lats = None, []
+        gc0 = gc.get_stats()[0]['collections']
+        for _ in range(repeat):
+            frames, total, lat = self.run_once()
+            lats.extend(lat)
+            if best is None or total < best[1]: best = (frames, total)
+        gen0 = (gc.get_stats()[0]['collections'] - gc0) / repeat
+        tracemalloc.start()
+        self.run_once()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lats.sort()
+        pct = lambda q: lats[min(len(lats) - 1, int(q * len(lats)))] / 1e3 if lats else 0.0
+        frames, total = best
+        return {'frames': frames, 'seconds': total / 1e9, 'frames_per_s': frames / (total / 1e9) if total else 0.0,
+                'lat_us_p50': pct(0.50), 'lat_us_p90': pct(0.90), 'lat_us_p99': pct(0.99),
+                'gc_gen0': gen0, 'peak_kb': peak / 1024, 'retained_kb': retained / 1024}
+
+def crc_stages(frames):
+    data = make_stream('clean', min(frames, 20000))
+    payloads = [data[i:i + PAYLOAD_SIZE] for i in range(0, len(data), PACKET_SIZE)]
+    one = lambda f: (lambda p: (f(p), 1)[1])
+    return [Stage('crc.bitwise', payloads[:2000], one(crc16_bitwise)),
+            Stage('crc.table', payloads, one(crc16_table)),
+            Stage('crc.default', payloads, one(crc16))]
+
+def decode_stages(frames, streams):
+    out = []
+    for kind, data in streams.items():
+        chunks = split_chunks(data)
+        out.append(Stage(f'decode.legacy.{kind}', [chunks[:max(1, len(chunks) // 10)]], legacy_resync))
+        dec = FrameDecoder()
+        def body(chunk, dec=dec):
+            dec.feed(chunk); return len(dec.decode())
+        out.append(Stage(f'decode.frame_decoder.{kind}', chunks, body, setup=dec.reset))
+    return out
+
+def parse_stages(frames):
+    data = make_stream('clean', frames)
+    payloads = [data[i:i + PAYLOAD_SIZE] for i in range(0, len(data), PACKET_SIZE)]
+    rows = [TLM_STRUCT.unpack(p) for p in payloads]
+    groups = [rows[i:i + 64] for i in range(0, len(rows), 64)]
+    def batch_body(group):
+        b = TelemetryBatch(); b.extend(group, 0.0); b['curr']; b.last(); return len(group)
+    blocks = [data[i:i + 4096 * PACKET_SIZE] for i in range(0, len(data), 4096 * PACKET_SIZE)]
+    return [Stage('parse.legacy_dict', payloads, lambda p: (legacy_parse(p), 1)[1]),
+            Stage('parse.batch', groups, batch_body),
+            Stage('parse.bulk', blocks, lambda blk: len(decode_frames(blk)))]
+
+def log_stages(frames, tmp):
+    from gcu_logger import TelemetryLogger, iter_log, iter_records
+    data = make_stream('clean', frames)
+    rows = [TLM_STRUCT.unpack_from(data, i) for i in range(0, len(data), PACKET_SIZE)]
+    state = {}
+
+    def csv_setup():
+        state['f'] = open(os.path.join(tmp, 'bench.csv'), 'w', newline=''); state['w'] = csv.writer(state['f'])
+    def csv_body(row):
+        d = dict(zip(('timeout',) + TLM_FIELDS, (False,) + row))
+        d['pc_time'] = datetime.now().strftime('%H:%M:%S.%f')
+        state['w'].writerow(d.values()); return 1
+    groups = []
+    for i in range(0, len(rows), 64):
+        b = TelemetryBatch(); b.extend(rows[i:i + 64], time.monotonic()); groups.append(b)
+    logger = TelemetryLogger(directory=tmp, prefix='bench_', queue_size=len(groups) + 1)
+    def bin_body(batch):
+        logger.write_batch(batch); return len(batch)
+    def submit_body(batch):
+        logger.submit(batch); return len(batch)
+    def read_setup():
+        if state.get('log'): return
+        w = TelemetryLogger(directory=tmp, prefix='bench_read_')
+        for batch in groups: w.write_batch(batch)
+        state['log'] = w.path; w._close_file()
+    def read_batches(path):
+        return sum(len(batch['curr']) for _, batch in iter_log(path))
+    def read_bulk(path):
+        return sum(len(rec['curr']) for _, rec in iter_records(path))
+    return [Stage('log.legacy_csv', rows, csv_body, setup=csv_setup, teardown=lambda: state['f'].close()),
+            Stage('log.binary_writer', groups, bin_body, teardown=logger._close_file),
+            Stage('log.submit', groups, submit_body, setup=logger.q.queue.clear),
+            Stage('log.read_batches', [None], lambda _: read_batches(state['log']), setup=read_setup),
+            Stage('log.read_bulk', [None], lambda _: read_bulk(state['log']), setup=read_setup)]
+
+_app = None
+
+def render_stages(frames):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtGui import QImage
+        import numpy as np
+        from gcu_monitor import RealTimeGraph
+    except ImportError as e:
+        print(f"render: skipped ({e})", file=sys.stderr)
+        return []
+    global _app
+    _app = QApplication.instance() or QApplication([])
+    out = []
+    rng = np.random.default_rng(1)
+    for cap in (300, 8192, 65536):
+        g = RealTimeGraph(max_val=20.0, title="BENCH", capacity=cap)
+        g.resize(800, 240)
+        img = QImage(800, 240, QImage.Format_ARGB32)
+        samples = (rng.random(cap) * 20).astype(np.float32)
+        def body(_, g=g, img=img, samples=samples):
+            g.add_values(samples); g.render(img); return 1
+        out.append(Stage(f'render.graph.{cap}', range(50), body))
+    return out
+
+STARTUP = {
+    'headless': "import gcu_capture; cap = gcu_capture.Capture('sim:', log_dir='')",
+    'gui': "from PyQt5.QtWidgets import QApplication; import gcu_monitor; app = QApplication([]); "
+           "w = gcu_monitor.MainWindow(); w.show(); app.processEvents(); w.close()",
+}
+# ru_maxrss survives fork/exec on Linux, so it reports the benchmark's own peak; VmHWM belongs to the new image
+STARTUP_PROBE = ("import sys, time, resource; t0 = time.perf_counter(); {}; "
+                 "hwm = [int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM:')] "
+                 "if sys.platform.startswith('linux') else []; "
+                 "print(time.perf_counter() - t0, hwm[0] if hwm else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+                 "len(sys.modules), 'PyQt5' in sys.modules)")
+
+def measure_startup(repeat, tmp):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for name, code in STARTUP.items():
+        walls, ready, rss = [], [], []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            proc = subprocess.run([sys.executable, '-c', STARTUP_PROBE.format(code)], cwd=tmp, env=env,
+                                  capture_output=True, text=True)
+            walls.append(time.perf_counter() - t0)
+            if proc.returncode:
+                print(f"startup.{name}: failed ({proc.stderr.strip().splitlines()[-1:]})", file=sys.stderr)
+                break
+            t_ready, kb, mods, qt = proc.stdout.split()
+            ready.append(float(t_ready)); rss.append(int(kb))
+        if not ready: continue
+        walls.sort(); ready.sort()
+        results[f'startup.{name}'] = {'frames': 1, 'seconds': walls[0], 'frames_per_s': 1 / walls[0],
+                                      'lat_us_p50': ready[len(ready) // 2] * 1e6, 'lat_us_p90': ready[-1] * 1e6,
+                                      'lat_us_p99': ready[-1] * 1e6, 'gc_gen0': 0, 'peak_kb': max(rss),
+                                      'retained_kb': 0, 'modules': int(mods), 'qt_loaded': qt == 'True'}
+    return results
+
+def run(args):
+    streams = {kind: make_stream(kind, args.frames, args.seed) for kind in STREAMS}
+    if args.recording: streams['recorded'] = load_recording(args.recording)
+    stages = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if 'crc' in args.stages: stages += crc_stages(args.frames)
+        if 'decode' in args.stages: stages += decode_stages(args.frames, streams)
+        if 'parse' in args.stages: stages += parse_stages(args.frames)
+        if 'log' in args.stages: stages += log_stages(args.frames, tmp)
+        if 'render' in args.stages: stages += render_stages(args.frames)
+        results = {}
+        for st in stages:
+            results[st.name] = st.measure(args.repeat)
+            print(f"{st.name:<36} {results[st.name]['frames_per_s']:>14,.0f} /s  "
+                  f"p50 {results[st.name]['lat_us_p50']:8.2f} us  p99 {results[st.name]['lat_us_p99']:8.2f} us  "
+                  f"peak {results[st.name]['peak_kb']:9.1f} KiB", file=sys.stderr)
+        if 'startup' in args.stages:
+            for name, res in measure_startup(args.repeat, tmp).items():
+                results[name] = res
+                print(f"{name:<36} {res['seconds'] * 1e3:11.1f} ms  ready {res['lat_us_p50'] / 1e3:8.1f} ms  "
+                      f"rss {res['peak_kb']:9.0f} KiB  modules {res['modules']}", file=sys.stderr)
+    return {'meta': {'python': sys.version.split()[0], 'platform': platform.platform(), 'machine': platform.machine(),
+                     'time': datetime.now().isoformat(timespec='seconds'), 'frames': args.frames,
+                     'seed': args.seed, 'repeat': args.repeat, 'recording': args.recording},
+            'results': results}
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for name, res in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or not base['frames_per_s']: continue
+        ratio = res['frames_per_s'] / base['frames_per_s']
+        flag = "REGRESSION" if ratio < 1.0 - tolerance else ""
+        if flag: regressions.append(name)
+        print(f"{name:<36} {ratio:6.2f}x {flag}", file=sys.stderr)
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Benchmark the GCU telemetry hot paths")
+    ap.add_argument('--stages', default='crc,decode,parse,log,render,startup')
+    ap.add_argument('--frames', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--recording', default=None, help="also decode a raw .gcur recording")
+    ap.add_argument('-o', '--out', default=None, help="write results as JSON")
+    ap.add_argument('--baseline', default=None, help="compare against a previous JSON result")
+    ap.add_argument('--tolerance', type=float, default=0.10)
+    args = ap.parse_args()
+    args.stages = set(args.stages.split(','))
+    res = run(args)
+    if args.out:
+        with open(args.out, 'w') as f: json.dump(res, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f: base = json.load(f)
+        sys.exit(1 if compare(res, base, args.tolerance) else 0)
@@ -0,0 +1,161 @@
+import sys
+import csv
+import json
+import time
+import queue
+import signal
+import resource
+from gcu_core import CommsCore
+from gcu_protocol import TLM_FIELDS
+from gcu_scope import Scope, DEFAULT_TRIGGERS, DEFAULT_PRE, DEFAULT_POST
+from gcu_stats import STATS, format_snapshot
+
+class Capture:
+    def __init__(self, port, io_mode='event', log_dir=".", record=False, dump=None, tx=True, print_events=False,
+                 reconnect=True, scope=None):
+        self.port = port
+        self.comms = CommsCore(io_mode=io_mode)
+        self.comms.tx_enabled = tx
+        self.comms.reconnect = reconnect
+        self.comms.emit_telemetry = self.on_batch
+        self.comms.emit_connection = self.on_connection
+        self.batches = queue.SimpleQueue()
+        self.logger = None
+        self.event_log = None
+        if print_events: self.comms.events.subscribe(self.print_events)
+        if log_dir:
+            from gcu_logger import TelemetryLogger
+            self.logger = TelemetryLogger(directory=log_dir)
+            STATS.gauge('log.written', lambda: self.logger.written, rate=True)
+            STATS.gauge('log.dropped', lambda: self.logger.dropped, rate=True)
+            from gcu_events import EventLog
+            self.event_log = EventLog(log_dir)
+            self.comms.events.subscribe(self.event_log.write)
+        self.scope = scope
+        self.comms.scope = scope
+        if scope:
+            STATS.gauge('scope.saved', lambda: scope.saved)
+            STATS.gauge('scope.dropped', lambda: scope.dropped)
+        self.record_path = None
+        if record and not port.startswith('replay:'):
+            from gcu_replay import default_recording_path
+            self.record_path = default_recording_path(log_dir or ".")
+        self.dump = dump
+        self.writer = None
+        self.frames = 0
+        self.connected = None
+
+    def on_batch(self, batch):
+        self.batches.put(batch)
+
+    def print_events(self, events):
+        from gcu_events import format_event
+        print("\n".join(format_event(ev) for ev in events), file=sys.stderr)
+
+    def on_connection(self, ok):
+        self.connected = ok
+
+    def start(self):
+        if self.logger: self.logger.start()
+        self.comms.start_comms(self.port, self.record_path)
+        while self.connected is None and self.comms.running: time.sleep(0.005)
+        return bool(self.connected)
+
+    def drain(self, timeout=0.0):
+        try: batch = self.batches.get(timeout=timeout) if timeout else self.batches.get_nowait()
+        except queue.Empty: return 0
+        n = 0
+        while True:
+            n += len(batch)
+            if self.logger: self.logger.submit(batch)
+            if self.dump: self.write_dump(batch)
+            try: batch = self.batches.get_nowait()
+            except queue.Empty: break
+        self.frames += n
+        return n
+
+    def write_dump(self, batch):
+        if self.dump == 'jsonl':
+            out = sys.stdout
+            for t, rec in zip(batch.times, batch):
+                out.write(json.dumps(dict(rec._asdict(), t=t)) + "\n")
+            return
+        if self.writer is None:
+            self.writer = csv.writer(sys.stdout)
+            self.writer.writerow(('t',) + TLM_FIELDS)
+        self.writer.writerows((t,) + row for t, row in zip(batch.times, batch.rows))
+
+    def stop(self):
+        self.comms.stop_comms()
+        self.drain()
+        if self.logger: self.logger.close()
+        if self.event_log: self.event_log.close()
+        if self.scope: self.scope.close()
+        sys.stdout.flush()
+
+    def summary(self):
+        out = dict(self.comms.link_stats(), captured=self.frames, reconnects=self.comms.reconnects, **self.comms.io_stats(),
+                   max_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        out['events'] = self.comms.events.stats()
+        if self.logger: out['log_files'] = self.logger.paths
+        if self.event_log and self.event_log.path: out['event_log'] = self.event_log.path
+        if self.record_path: out['recording'] = self.record_path
+        errors = {'events': self.event_log.errors if self.event_log else 0,
+                  'recording': self.comms.recorder.errors if self.comms.recorder else 0}
+        if any(errors.values()): out['sink_errors'] = errors
+        if self.scope: out['scope'] = dict(self.scope.stats(), files=list(self.scope.paths))
+        return out
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Headless GCU telemetry capture (no Qt)")
+    ap.add_argument('port', help="serial device, pty:PATH, tcp:HOST:PORT, sim:k=v,... or replay:FILE[@SPEED]")
+    ap.add_argument('--io', choices=('event', 'poll', 'process'), default='event')
+    ap.add_argument('--log-dir', default=".", help="binary log directory, '' to disable logging")
+    ap.add_argument('--record', action='store_true', help="also record the raw byte stream")
+    ap.add_argument('--dump', choices=('csv', 'jsonl'), default=None, help="print decoded frames to stdout")
+    ap.add_argument('--events', action='store_true', help="print decoded events to stderr")
+    ap.add_argument('--no-tx', action='store_true', help="listen only, do not send command frames")
+    ap.add_argument('--no-reconnect', action='store_true', help="exit when the port goes away instead of reopening it")
+    ap.add_argument('--scope', action='store_true', help="save full-rate snapshots around trigger events")
+    ap.add_argument('--trigger', action='append', default=None, metavar='SPEC',
+                    help="scope trigger 'label:field OP value', repeatable (default: misfire, state 10, state 11)")
+    ap.add_argument('--scope-pre', type=int, default=DEFAULT_PRE, help="frames kept before each trigger")
+    ap.add_argument('--scope-post', type=int, default=DEFAULT_POST, help="frames captured after each trigger")
+    ap.add_argument('--duration', type=float, default=None, help="stop after this many seconds")
+    ap.add_argument('--frames', type=int, default=None, help="stop after this many frames")
+    ap.add_argument('--stats-interval', type=float, default=0.0, help="print stats to stderr every N seconds")
+    ap.add_argument('--stats-file', default=None, help="append a JSON stats snapshot every stats interval")
+    args = ap.parse_args(argv)
+
+    scope = None
+    if args.scope or args.trigger:
+        try: scope = Scope(args.trigger or DEFAULT_TRIGGERS, args.scope_pre, args.scope_post, directory=args.log_dir or ".")
+        except ValueError as e: ap.error(str(e))
+    cap = Capture(args.port, args.io, args.log_dir, args.record, args.dump, not args.no_tx, args.events,
+                  not args.no_reconnect, scope)
+    stop = []
+    signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+    if not cap.start():
+        err = cap.comms.open_error
+        print(f"could not open {args.port}" + (f": {err}" if err else ""), file=sys.stderr)
+        return 1
+    t0 = time.monotonic()
+    deadline = t0 + args.duration if args.duration else float('inf')
+    next_stats = t0 + args.stats_interval if args.stats_interval else float('inf')
+    while not stop and cap.comms.running and time.monotonic() < deadline:
+        cap.drain(0.05)
+        if args.frames and cap.frames >= args.frames: break
+        now = time.monotonic()
+        if now >= next_stats:
+            snap = STATS.snapshot()
+            print(format_snapshot(snap), file=sys.stderr)
+            if args.stats_file: STATS.export(args.stats_file, snap)
+            next_stats = now + args.stats_interval
+    cap.stop()
+    print(json.dumps(cap.summary()), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
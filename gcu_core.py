@@ -0,0 +1,341 @@
+import time
+import threading
+import selectors
+from gcu_crc import crc16
+from gcu_stats import STATS
+from gcu_events import EventDetector
+from gcu_link import LinkMonitor
+from gcu_ports import Backoff
+from gcu_protocol import (BAUD_RATE, TLM_CODEC, TX_INTERVAL, LINK_TIMEOUT, FrameDecoder, TelemetryBatch,
+                          encode_command)
+
+calc_crc16 = crc16
+
+class PortLost(OSError):
+    pass
+
+class CommsCore:
+    def __init__(self, emit_interval=0.030, io_mode='event', name=''):
+        self.name = name
+        self.port_name = ""
+        self.io_mode = io_mode
+        self.worker = None
+        self.worker_stats = None
+        self.thread_obj = None
+        self.wakeups = 0
+        self.cpu_s = 0.0
+        self.wall_s = 0.0
+        self.record_path = None
+        self.recorder = None
+        self.open_error = None
+        self.scope = None
+        self.tx_enabled = True
+        self.reconnect = True
+        self.reconnects = 0
+        self.backoff = Backoff()
+        self.port_event = threading.Event()
+        self.emit_interval = emit_interval
+        self.running = False
+        self.last_rx_time = 0
+        self.last_tx_time = 0.0
+        self.last_emit_time = 0.0
+        self.cmd_enable = False
+        self.cmd_safety = True
+        self.cmd_load = False
+        self.cmd_fire = False
+        self.cmd_manual = 0
+        self.cmd_bypass = False
+        self.cmd_reset_cycle = False
+        self.req_set_ammo = 0
+        self.mode = 0
+        self.burst = 1
+        self.timings = [35, 80, 450, 10000]
+        self.seq = 0
+        self.decoder = FrameDecoder()
+        self.pending = TelemetryBatch()
+        self.events = EventDetector()
+        self.link = LinkMonitor(LINK_TIMEOUT)
+        self.events.subscribe(lambda events: self.emit_events(events))
+        pre = f"{name}." if name else ""
+        self.h_decode = STATS.histogram(pre + 'comms.decode')
+        self.c_batches = STATS.counter(pre + 'comms.batches')
+        for key in ('bytes_in', 'frames', 'crc_errors', 'discarded'):
+            STATS.gauge(f"{pre}rx.{key}", lambda key=key: self.link_stats()[key], rate=True)
+        STATS.gauge(pre + 'comms.pending', lambda: len(self.pending))
+        for key in ('health', 'rate', 'jitter_ms', 'crc_rate', 'gaps'):
+            STATS.gauge(f"{pre}link.{key}", lambda key=key: round(self.link.snapshot()[key], 3))
+        STATS.gauge(pre + 'events.total', lambda: sum(self.events.counts.values()), rate=True)
+        STATS.gauge(pre + 'comms.reconnects', lambda: self.reconnects)
+        if name: return
+        STATS.gauge('comms.wakeups', lambda: self.wakeups, rate=True)
+        STATS.gauge('ring.fill', lambda: self.worker.reader.fill if self.worker else None)
+        STATS.gauge('ring.overruns', lambda: self.worker.reader.overruns if self.worker else None, rate=True)
+
+    # Overridden by the Qt front end to emit signals; the headless capture sets callbacks instead.
+    def emit_telemetry(self, batch): pass
+    def emit_link(self, up): pass
+    def emit_connection(self, ok): pass
+    def emit_events(self, events): pass
+
+    def start(self):
+        self.thread_obj = threading.Thread(target=self.run, name="gcu-comms", daemon=True)
+        self.thread_obj.start()
+
+    def wait(self, timeout=None):
+        if self.thread_obj: self.thread_obj.join(timeout)
+        return True
+
+    def set_link(self, up, now):
+        self.events.link(up, now)
+        self.emit_link(up)
+
+    def link_stats(self):
+        if self.worker: return self.worker.ring.stats()
+        if self.io_mode == 'process' and self.worker_stats: return self.worker_stats
+        return self.decoder.stats()
+
+    def start_comms(self, port, record_path=None):
+        self.port_name = port
+        self.record_path = record_path
+        self.running = True
+        self.start()
+
+    def stop_comms(self):
+        self.running = False
+        self.port_event.set()
+        self.wait()
+
+    def port_appeared(self):
+        # called by a port watcher when the device node comes back, so a reconnect does not wait out its backoff
+        self.port_event.set()
+
+    def run(self):
+        if self.io_mode == 'process': return self.run_worker()
+        ser = None
+        self.recorder = None
+        self.open_error = None
+        self.port_event.clear()
+        try:
+            ser = self.open_port()
+            self.emit_connection(True)
+        except Exception as e:
+            self.open_error = e
+            self.emit_connection(False)
+            return
+
+        self.begin()
+        cpu0, wall0 = time.thread_time(), time.monotonic()
+        sel = self.make_selector(ser) if self.io_mode == 'event' else None
+
+        while self.running:
+            try:
+                now = time.monotonic()
+                self.wakeups += 1
+                if not self.service(ser, now): break
+            except PortLost:
+                if not self.reconnect: break
+                ser = self.recover(ser)
+                if ser is None: break
+                if sel: sel.close(); sel = self.make_selector(ser)
+            except Exception: pass
+            if self.io_mode == 'event': self.wait_io(sel, ser)
+            else: time.sleep(0.0001)
+
+        self.cpu_s, self.wall_s = time.thread_time() - cpu0, time.monotonic() - wall0
+        if sel: sel.close()
+        self.finish(ser)
+
+    # begin/service/finish are the loop body, so a session can drive several links from one thread
+    def begin(self):
+        self.decoder.reset()
+        self.events.reset()
+        self.pending = TelemetryBatch()
+        self.last_tx_time = 0.0
+        self.last_emit_time = 0.0
+        self.last_rx_time = time.monotonic()
+        self.link.reset(self.last_rx_time)
+        self.wakeups = 0
+
+    def service(self, ser, now, readable=True):
+        if self.link.check(now): self.set_link(False, now)
+
+        if now - self.last_tx_time >= TX_INTERVAL: self.send_command(ser, now)
+
+        data = None
+        if readable:
+            # only the port's own I/O means the device is gone; sinks on this thread handle their own errors
+            try: data = ser.read(ser.in_waiting) if ser.in_waiting else None
+            except OSError as e: raise PortLost(e) from e
+        if data:
+            self.decoder.feed(data)
+            t0 = time.perf_counter()
+            frames = self.decoder.decode()
+            self.h_decode.observe(time.perf_counter() - t0)
+            dec = self.decoder
+            self.link.on_counters(now, dec.crc_errors, dec.discarded)
+            if frames:
+                self.last_rx_time = now
+                if self.link.on_frames(now, len(frames)): self.set_link(True, now)
+                self.events.feed(frames, now)
+                if self.scope: self.scope.feed(frames, now)
+                self.pending.extend(frames, now)
+        elif readable and getattr(ser, 'eof', False): return False
+
+        if self.pending and now - self.last_emit_time >= self.emit_interval:
+            self.flush_pending()
+            self.last_emit_time = now
+        return True
+
+    def finish(self, ser):
+        self.flush_pending()
+        if self.scope: self.scope.flush()
+        now = time.monotonic()
+        if self.link.drop(now): self.set_link(False, now)
+        if ser and ser.is_open: ser.close()
+        if self.recorder: self.recorder.close()
+        self.running = False
+        self.emit_connection(False)
+
+    # Reconnect keeps the decoder counters, event state, pending batch, logger and raw recording,
+    # so a USB re-enumeration shows up as a link down/up pair rather than a new session.
+    def lose_port(self, ser, now):
+        try: (ser.port if self.recorder else ser).close()
+        except Exception: pass
+        if self.link.drop(now): self.set_link(False, now)
+        self.flush_pending()
+        self.backoff.reset(now)
+
+    def try_reopen(self, now):
+        if not self.backoff.due(now): return None
+        try: ser = self.open_port()
+        except Exception:
+            self.backoff.failed(now)
+            return None
+        self.reconnects += 1
+        self.decoder.reset()
+        self.last_tx_time = 0.0
+        return ser
+
+    def recover(self, ser):
+        self.lose_port(ser, time.monotonic())
+        while self.running:
+            ser = self.try_reopen(time.monotonic())
+            if ser: return ser
+            if self.port_event.wait(max(0.0, self.backoff.next_at - time.monotonic())):
+                self.port_event.clear()
+                self.backoff.reset(time.monotonic())
+        return None
+
+    def command_fields(self, ammo):
+        return (self.mode, self.timings,
+                1 if self.cmd_safety else 0, 1 if self.cmd_load else 0, 1 if self.cmd_fire else 0,
+                self.cmd_manual, self.burst, ammo,
+                1 if self.cmd_enable else 0, 1 if self.cmd_bypass else 0, 1 if self.cmd_reset_cycle else 0)
+
+    def run_worker(self):
+        from gcu_worker import WorkerLink
+        self.worker = WorkerLink(self.port_name, record_path=self.record_path)
+        if not self.worker.start():
+            self.worker.close(); self.worker = None
+            self.emit_connection(False)
+            return
+        self.emit_connection(True)
+        self.events.reset()
+        self.last_rx_time = time.monotonic()
+        self.link.reset(self.last_rx_time)
+        cpu0, wall0 = time.thread_time(), time.monotonic()
+        while self.running and self.worker.alive:
+            self.wakeups += 1
+            ammo, self.req_set_ammo = self.req_set_ammo, 0
+            if self.tx_enabled: self.worker.send(self.command_fields(0), ammo)
+            batch = self.worker.read()
+            now = time.monotonic()
+            rs = self.worker.ring.stats()
+            self.link.on_counters(now, rs['crc_errors'], rs['discarded'])
+            if batch:
+                self.last_rx_time = batch.times[-1]
+                if self.link.on_frames(self.last_rx_time, len(batch)): self.set_link(True, now)
+                self.events.feed_batch(batch)
+                if self.scope: self.scope.feed_batch(batch)
+                self.c_batches.inc()
+                self.emit_telemetry(batch)
+            elif self.link.check(now): self.set_link(False, now)
+            time.sleep(max(0.001, self.emit_interval))
+        self.cpu_s, self.wall_s = time.thread_time() - cpu0, time.monotonic() - wall0
+        batch = self.worker.read()
+        if batch:
+            self.events.feed_batch(batch)
+            if self.scope: self.scope.feed_batch(batch)
+            self.emit_telemetry(batch)
+        if self.scope: self.scope.flush()
+        now = time.monotonic()
+        if self.link.drop(now): self.set_link(False, now)
+        self.worker_stats = self.worker.ring.stats()
+        self.worker.close()
+        self.worker = None
+        self.running = False
+        self.emit_connection(False)
+
+    def ring_stats(self):
+        return self.worker.stats() if self.worker else None
+
+    def send_command(self, ser, now):
+        if not self.tx_enabled:
+            self.last_tx_time = now
+            return
+        self.seq = (self.seq + 1) & 0xFFFF
+        ammo_to_send = self.req_set_ammo
+        self.req_set_ammo = 0
+
+        try:
+            ser.write(encode_command(self.seq, *self.command_fields(ammo_to_send)))
+            self.last_tx_time = now
+        except Exception:
+            pass
+
+    def make_selector(self, ser):
+        try:
+            fd = ser.fileno()
+            sel = selectors.DefaultSelector()
+            sel.register(fd, selectors.EVENT_READ)
+            return sel
+        except Exception:
+            return None
+
+    def next_deadline(self, now):
+        deadline = self.last_tx_time + TX_INTERVAL
+        if self.pending: deadline = min(deadline, self.last_emit_time + self.emit_interval)
+        rx_deadline = self.link.deadline()
+        if rx_deadline and rx_deadline > now: deadline = min(deadline, rx_deadline)
+        return deadline
+
+    def wait_io(self, sel, ser):
+        now = time.monotonic()
+        timeout = max(0.0, self.next_deadline(now) - now)
+        if sel: sel.select(timeout)
+        else:
+            due = getattr(ser, 'next_due', None)
+            if due: timeout = min(timeout, due() or 0.0)
+            if timeout > 0: time.sleep(timeout)
+
+    def io_stats(self):
+        return {'mode': self.io_mode, 'wakeups': self.wakeups, 'cpu_s': self.cpu_s, 'wall_s': self.wall_s}
+
+    def open_port(self):
+        from gcu_transport import open_transport
+        port = open_transport(self.port_name, BAUD_RATE)
+        if self.record_path:
+            from gcu_replay import SessionRecorder, RecordingPort
+            if self.recorder is None:
+                self.recorder = SessionRecorder(self.record_path, {'port': self.port_name, 'baud': BAUD_RATE})
+            port = RecordingPort(port, self.recorder)
+        return port
+
+    def flush_pending(self):
+        if not self.pending: return
+        batch, self.pending = self.pending, TelemetryBatch()
+        self.c_batches.inc()
+        self.emit_telemetry(batch)
+
+    def parse_fast(self, payload):
+        return TLM_CODEC.unpack(payload)
@@ -0,0 +1,119 @@
+import binascii
+import struct
+
+CRC_POLY = 0x1021
+CRC_INIT = 0xFFFF
+CRC_CHECK = 0x29B1  # CRC-16/CCITT-FALSE of b"123456789"
+
+def crc16_bitwise(data, crc=CRC_INIT):
+    for byte in data:
+        crc ^= (byte << 8)
+        for _ in range(8):
+            if crc & 0x8000: crc = (crc << 1) ^ CRC_POLY
+            else: crc <<= 1
+        crc &= 0xFFFF
+    return crc
+
+def _make_table():
+    return tuple(crc16_bitwise((i,), 0) for i in range(256))
+
+CRC_TABLE = _make_table()
+
+def crc16_table(data, crc=CRC_INIT):
+    tbl = CRC_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFF00) ^ tbl[(crc >> 8) ^ byte]
+    return crc
+
+def _hqx_matches():
+    try:
+        for sample in (b"123456789", bytes(range(256)), b"\x55" * 66):
+            if binascii.crc_hqx(sample, CRC_INIT) != crc16_table(sample): return False
+        return binascii.crc_hqx(b"123456789", CRC_INIT) == CRC_CHECK
+    except Exception:
+        return False
+
+HQX_OK = _hqx_matches()
+
+def crc16(data, crc=CRC_INIT, use_hqx=HQX_OK):
+    if use_hqx:
+        try: return binascii.crc_hqx(data, crc)
+        except TypeError: pass  # not bytes-like (e.g. list of ints)
+    return crc16_table(data, crc)
+
+_WORD_TABLE = None
+
+def crc16_rows(rows, crc=CRC_INIT):
+    # CRC of every row of a 2-D uint8 array at once, two bytes per step through a 64K-entry table
+    global _WORD_TABLE
+    import numpy as np
+    tbl = np.array(CRC_TABLE, np.uint16)
+    if _WORD_TABLE is None:
+        x = np.arange(1 << 16, dtype=np.uint16)
+        r = tbl[x >> 8]
+        _WORD_TABLE = (r << 8) ^ tbl[(r >> 8) ^ (x & 0xFF)]
+    n, width = rows.shape
+    words = np.ascontiguousarray(rows[:, :width & ~1]).view('>u2').T.copy()
+    out = np.full(n, crc, np.uint16)
+    for w in words:
+        out = _WORD_TABLE[out ^ w]
+    if width & 1:
+        out = (out << 8) ^ tbl[(out >> 8) ^ rows[:, -1]]
+    return out
+
+class Crc16:
+    __slots__ = ('value', 'use_hqx')
+
+    def __init__(self, data=b"", crc=CRC_INIT, use_hqx=HQX_OK):
+        self.use_hqx = use_hqx
+        self.value = crc
+        if data: self.update(data)
+
+    def update(self, data):
+        self.value = crc16(data, self.value, self.use_hqx)
+        return self
+
+    def reset(self, crc=CRC_INIT):
+        self.value = crc
+
+    def copy(self):
+        return Crc16(crc=self.value, use_hqx=self.use_hqx)
+
+    def digest(self):
+        return struct.pack('<H', self.value)
+
+_U16 = struct.Struct('<H')
+
+def check_frame(buf, offset, size, use_hqx=HQX_OK):
+    mv = memoryview(buf)
+    end = offset + size - 2
+    return crc16(mv[offset:end], CRC_INIT, use_hqx) == _U16.unpack_from(mv, end)[0]
+
+def check_frames(buf, offsets, size, use_hqx=HQX_OK):
+    mv = memoryview(buf)
+    n = len(mv)
+    unpack = _U16.unpack_from
+    crc_hqx = binascii.crc_hqx
+    tbl_crc = crc16_table
+    out = []
+    for off in offsets:
+        end = off + size - 2
+        if off < 0 or end + 2 > n:
+            out.append(False); continue
+        body = mv[off:end]
+        calc = crc_hqx(body, CRC_INIT) if use_hqx else tbl_crc(body)
+        out.append(calc == unpack(mv, end)[0])
+    return out
+
+def valid_offsets(buf, offsets, size, use_hqx=HQX_OK):
+    return [off for off, ok in zip(offsets, check_frames(buf, offsets, size, use_hqx)) if ok]
+
+def candidate_offsets(buf, header, size, start=0):
+    out = []
+    find = buf.find
+    limit = len(buf) - size
+    pos = find(header, start)
+    while 0 <= pos <= limit:
+        out.append(pos)
+        pos = find(header, pos + 1)
+    return out
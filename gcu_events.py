@@ -0,0 +1,141 @@
+import os
+import time
+from itertools import repeat
+from operator import itemgetter
+from collections import namedtuple
+from datetime import datetime
+from gcu_protocol import TLM_INDEX
+
+ERROR_STATE = 10
+EV_STATE, EV_ERROR_ENTER, EV_ERROR_EXIT, EV_ACK, EV_MISFIRE, EV_SUCCESS, EV_LINK = range(1, 8)
+EVENT_NAMES = {EV_STATE: 'state', EV_ERROR_ENTER: 'error_enter', EV_ERROR_EXIT: 'error_exit', EV_ACK: 'ack',
+               EV_MISFIRE: 'misfire', EV_SUCCESS: 'success', EV_LINK: 'link'}
+EVENT_KINDS = {name: kind for kind, name in EVENT_NAMES.items()}
+
+# frame is the running count of decoded frames, so events can be lined up with the raw log or history store
+Event = namedtuple('Event', ('t', 'frame', 'kind', 'old', 'new'))
+
+_KEY = itemgetter(TLM_INDEX['state'], TLM_INDEX['ack_flags'], TLM_INDEX['misfire'], TLM_INDEX['success'])
+
+class EventDetector:
+    def __init__(self):
+        self.prev = None
+        self.frame = 0
+        self.link_up = None
+        self.counts = dict.fromkeys(EVENT_NAMES, 0)
+        self.subscribers = []
+
+    def subscribe(self, fn):
+        self.subscribers.append(fn)
+
+    def reset(self):
+        self.prev = None
+
+    def feed(self, rows, t):
+        return self.scan(rows, repeat(t), t)
+
+    def feed_batch(self, batch):
+        return self.scan(batch.rows, batch.times, batch.times[0] if batch else 0.0)
+
+    def scan(self, rows, times, t0):
+        out = []
+        if rows and self.link_up is not True:
+            self.link_up = True
+            out.append(Event(t0, self.frame, EV_LINK, 0, 1))
+        prev, frame = self.prev, self.frame
+        for row, t in zip(rows, times):
+            key = _KEY(row)
+            if key != prev:
+                self.diff(prev, key, t, frame, out)
+                prev = key
+            frame += 1
+        self.prev, self.frame = prev, frame
+        if out: self.publish(out)
+        return out
+
+    def diff(self, prev, key, t, frame, out):
+        st, ack, mis, suc = key
+        if prev is None:
+            out.append(Event(t, frame, EV_STATE, -1, st))
+            if st >= ERROR_STATE: out.append(Event(t, frame, EV_ERROR_ENTER, -1, st))
+            return
+        pst, pack, pmis, psuc = prev
+        if st != pst:
+            out.append(Event(t, frame, EV_STATE, pst, st))
+            if pst >= ERROR_STATE: out.append(Event(t, frame, EV_ERROR_EXIT, pst, st))
+            if st >= ERROR_STATE: out.append(Event(t, frame, EV_ERROR_ENTER, pst, st))
+        if ack != pack: out.append(Event(t, frame, EV_ACK, pack, ack))
+        if mis != pmis: out.append(Event(t, frame, EV_MISFIRE, pmis, mis))
+        if suc != psuc: out.append(Event(t, frame, EV_SUCCESS, psuc, suc))
+
+    def link(self, up, t):
+        if self.link_up is up or (self.link_up is None and up): return None
+        self.link_up = up
+        ev = [Event(t, self.frame, EV_LINK, int(not up), int(up))]
+        if not up: self.prev = None
+        self.publish(ev)
+        return ev
+
+    def publish(self, events):
+        counts = self.counts
+        for ev in events: counts[ev.kind] += 1
+        for fn in self.subscribers: fn(events)
+
+    def stats(self):
+        return {EVENT_NAMES[k]: n for k, n in self.counts.items()}
+
+def format_event(ev, t0=0.0, state_text=None):
+    name = EVENT_NAMES[ev.kind]
+    if ev.kind in (EV_STATE, EV_ERROR_ENTER, EV_ERROR_EXIT) and state_text:
+        old, new = state_text.get(ev.old, ev.old), state_text.get(ev.new, ev.new)
+    elif ev.kind == EV_LINK: old, new = ('DOWN', 'UP') if ev.new else ('UP', 'DOWN')
+    else: old, new = ev.old, ev.new
+    return f"{ev.t - t0:10.3f} {name:<11} {old}->{new}"
+
+class EventLog:
+    def __init__(self, directory=".", prefix="events_", flush_interval=1.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.file = None
+        self.path = None
+        self.written = 0
+        self.errors = 0
+        self.failed = False
+        self.last_flush = 0.0
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        self.file = open(self.path, 'a')
+        if not self.file.tell():
+            self.file.write(f"# wall_t0={time.time():.6f} mono_t0={time.monotonic():.6f}\n")
+            self.file.write("t_mono,frame,event,old,new\n")
+
+    def write(self, events):
+        if self.failed: return
+        try:
+            if self.file is None: self._open()
+            self.file.write("".join(f"{ev.t:.6f},{ev.frame},{EVENT_NAMES[ev.kind]},{ev.old},{ev.new}\n" for ev in events))
+            self.written += len(events)
+            now = time.monotonic()
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush(); self.last_flush = now
+        except OSError:
+            # runs on the comms thread: a full disk stops the event log, not the link
+            self.errors += 1
+            self.failed = True
+            self.close()
+
+    def close(self):
+        if self.file:
+            try: self.file.close()
+            except OSError: pass
+            self.file = None
+
+def read_events(path):
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#') or line.startswith('t_mono'): continue
+            t, frame, name, old, new = line.rstrip('\n').split(',')
+            yield Event(float(t), int(frame), EVENT_KINDS[name], int(old), int(new))
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+import numpy as np
+
+HIST_MAGIC = 'GCUH'
+HIST_VERSION = 1
+HIST_EXT = '.gcuh'
+CHANNELS = ('curr', 'pos', 'p1', 'p2')
+FACTOR = 16
+LEVELS = 5                  # raw samples plus buckets of 16, 256, 4096 and 65536 samples
+
+# One directory per session: t.f64 and <channel>.f32 hold every sample, <channel>.L<k>.f32 holds
+# (min, max, mean) triplets for buckets of FACTOR**k samples. Everything is append-only, so readers
+# can memory-map the files while the writer is still appending. After start(), append() only queues
+# the batch and a writer thread does the reduction and the buffered writes, like TelemetryLogger.
+class HistoryStore:
+    def __init__(self, path, channels=CHANNELS, factor=FACTOR, levels=LEVELS, writable=False,
+                 queue_size=256, flush_interval=0.5):
+        self.path = path
+        self.channels = tuple(channels)
+        self.factor = factor
+        self.levels = levels
+        self.writable = writable
+        self.files = {}
+        self.maps = {}
+        self.pend = {}
+        self.count = 0
+        self.visible = 0            # samples flushed to disk, so memory-mapped readers see all of them
+        self.meta = None
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.q = None
+        self.thread = None
+        self.dropped = 0
+        self.errors = 0
+
+    @classmethod
+    def create(cls, directory=".", prefix="hist_", channels=CHANNELS):
+        stem = os.path.join(directory, f"{prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        path, n = stem + HIST_EXT, 1
+        while os.path.exists(path):
+            path = f"{stem}_{n:03d}{HIST_EXT}"; n += 1
+        return cls(path, channels, writable=True)
+
+    @classmethod
+    def open(cls, path):
+        with open(os.path.join(path, 'meta.json')) as f: meta = json.load(f)
+        if meta.get('magic') != HIST_MAGIC: raise ValueError("not a GCU history store")
+        if meta['version'] > HIST_VERSION: raise ValueError(f"unsupported history version {meta['version']}")
+        store = cls(path, meta['channels'], meta['factor'], meta['levels'])
+        store.meta = meta
+        store.count = os.path.getsize(store._file('t')) // 8
+        return store
+
+    def __len__(self):
+        return self.visible if self.writable else len(self._map('t'))
+
+    def _file(self, name):
+        return os.path.join(self.path, name + ('.f64' if name == 't' else '.f32'))
+
+    def _start(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.meta = {'magic': HIST_MAGIC, 'version': HIST_VERSION, 'channels': self.channels,
+                     'factor': self.factor, 'levels': self.levels, 'wall_t0': time.time(), 'mono_t0': time.monotonic()}
+        self.write_meta()
+        names = ['t'] + [f"{ch}{lvl}" for ch in self.channels for lvl in [''] + [f".L{k}" for k in range(1, self.levels)]]
+        self.files = {name: open(self._file(name), 'ab') for name in names}
+        self.pend = {ch: [np.empty((0, 3), np.float32) for _ in range(self.levels)] for ch in self.channels}
+
+    def write_meta(self):
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f: json.dump(self.meta, f, indent=1)
+
+    def start(self):
+        if not self.writable or self.thread: return
+        self.q = queue.Queue(maxsize=self.queue_size)
+        self.thread = threading.Thread(target=self.run, name="gcu-history", daemon=True)
+        self.thread.start()
+
+    def append(self, batch):
+        if not batch: return
+        if self.thread is None: return self.write_batch(batch)
+        try: self.q.put_nowait(batch)
+        except queue.Full: self.dropped += len(batch)
+
+    def write_batch(self, batch):
+        self.extend(np.frombuffer(batch.times, np.float64), {ch: batch[ch] for ch in self.channels})
+
+    def run(self):
+        last_flush = time.monotonic()
+        while True:
+            try: batch = self.q.get(timeout=self.flush_interval)
+            except queue.Empty: batch = ()
+            if batch is None: break
+            if batch:
+                try: self.write_batch(batch)
+                except OSError: self.errors += 1; self.dropped += len(batch)
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval:
+                self.flush(); last_flush = now
+
+    def flush(self):
+        for f in self.files.values(): f.flush()
+        self.visible = self.count
+
+    def extend(self, times, cols):
+        if not self.writable or not len(times): return
+        if not self.files: self._start()
+        self.files['t'].write(np.ascontiguousarray(times, np.float64).tobytes())
+        for ch in self.channels:
+            col = np.ascontiguousarray(cols[ch], dtype=np.float32)
+            self.files[ch].write(col.tobytes())
+            self._reduce(ch, np.repeat(col, 3).reshape(-1, 3))
+        self.count += len(times)
+
+    def _reduce(self, ch, trip):
+        f, pend = self.factor, self.pend[ch]
+        for k in range(1, self.levels):
+            if len(pend[k]): trip = np.concatenate((pend[k], trip))
+            full = len(trip) - len(trip) % f
+            pend[k] = trip[full:].copy()
+            if not full: return
+            g = trip[:full].reshape(-1, f, 3)
+            trip = np.empty((full // f, 3), np.float32)
+            trip[:, 0] = g[:, :, 0].min(axis=1)
+            trip[:, 1] = g[:, :, 1].max(axis=1)
+            trip[:, 2] = g[:, :, 2].mean(axis=1)
+            self.files[f"{ch}.L{k}"].write(trip.tobytes())
+
+    def close(self, timeout=5.0):
+        if self.thread:
+            while True:
+                try: self.q.put(None, timeout=timeout); break
+                except queue.Full:
+                    try: self.dropped += len(self.q.get_nowait() or ())
+                    except queue.Empty: pass
+            self.thread.join(timeout)
+            self.thread = None
+        for f in self.files.values(): f.close()
+        self.files = {}
+        self.maps = {}
+        self.writable = False
+
+    def _map(self, name, width=1):
+        path = self._file(name)
+        try: size = os.path.getsize(path)
+        except OSError: size = 0
+        itemsize = (8 if name == 't' else 4) * width
+        n = size // itemsize
+        m = self.maps.get(name)
+        if m is None or len(m) != n:
+            if not n: return np.empty((0, width) if width > 1 else 0, np.float32)
+            m = np.memmap(path, np.float64 if name == 't' else np.float32, 'r', shape=(n, width) if width > 1 else (n,))
+            self.maps[name] = m
+        return m
+
+    def level(self, ch, k):
+        return self._map(ch) if k == 0 else self._map(f"{ch}.L{k}", 3)
+
+    def times(self, start=0, stop=None):
+        return self._map('t')[start:stop]
+
+    def time_at(self, i):
+        t = self._map('t')
+        return float(t[min(max(i, 0), len(t) - 1)]) if len(t) else 0.0
+
+    def _cover(self, ch, start, stop, k, out):
+        if start >= stop: return
+        if k == 0:
+            raw = np.asarray(self._map(ch)[start:stop])
+            out.append((np.arange(start, start + len(raw)), raw, raw, raw, 1))
+            return
+        b = self.factor ** k
+        lvl = self.level(ch, k)
+        a, z = -(-start // b), min(stop // b, len(lvl))
+        if a >= z: return self._cover(ch, start, stop, k - 1, out)
+        self._cover(ch, start, a * b, k - 1, out)
+        trip = np.asarray(lvl[a:z])
+        out.append((np.arange(a, z) * b, trip[:, 0], trip[:, 1], trip[:, 2], b))
+        self._cover(ch, z * b, stop, k - 1, out)
+
+    def query(self, ch, start, stop, cols):
+        stop = min(stop, len(self))
+        start = max(0, start)
+        n = stop - start
+        if n <= 0 or cols <= 0: return np.empty(0, np.int64), *(np.empty(0, np.float32),) * 3
+        k = 0
+        while k + 1 < self.levels and self.factor ** (k + 1) * cols <= n: k += 1
+        segs = []
+        self._cover(ch, start, stop, k, segs)
+        pos = np.concatenate([s[0] for s in segs])
+        mn = np.concatenate([s[1] for s in segs])
+        mx = np.concatenate([s[2] for s in segs])
+        sm = np.concatenate([s[3] * s[4] for s in segs]).astype(np.float64)
+        cnt = np.concatenate([np.full(len(s[0]), s[4]) for s in segs])
+        col = ((pos - start) * cols) // n
+        starts = np.flatnonzero(np.r_[True, col[1:] != col[:-1]])
+        return (col[starts], np.minimum.reduceat(mn, starts), np.maximum.reduceat(mx, starts),
+                (np.add.reduceat(sm, starts) / np.add.reduceat(cnt, starts)).astype(np.float32))
+
+def build_from_log(log_path, out_dir=None, channels=CHANNELS):
+    from gcu_logger import iter_records
+    base = os.path.splitext(os.path.basename(log_path))[0]
+    store = HistoryStore(os.path.join(out_dir or os.path.dirname(log_path) or '.', base + HIST_EXT), channels, writable=True)
+    meta = None
+    for meta, rec in iter_records(log_path):
+        store.extend(rec['t_mono'], {ch: rec[ch] for ch in channels})
+    n = store.count
+    if n:
+        store.meta.update(wall_t0=meta['wall_t0'], mono_t0=meta['mono_t0'], source=os.path.basename(log_path))
+        store.write_meta()
+    store.close()
+    return store.path, n
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    ap = argparse.ArgumentParser(description="Build or query GCU history stores")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help="build a history store from binary logs")
+    b.add_argument('logs', nargs='+')
+    b.add_argument('-o', '--out-dir', default=None)
+    q = sub.add_parser('query', help="print min/max/mean columns over a sample range")
+    q.add_argument('store')
+    q.add_argument('--channel', default='curr')
+    q.add_argument('--start', type=int, default=0)
+    q.add_argument('--stop', type=int, default=None)
+    q.add_argument('--cols', type=int, default=20)
+    s = sub.add_parser('bench', help="time queries against a synthetic store")
+    s.add_argument('--samples', type=int, default=10_000_000)
+    s.add_argument('--cols', type=int, default=1000)
+    args = ap.parse_args()
+
+    if args.cmd == 'build':
+        for src in args.logs:
+            path, n = build_from_log(src, args.out_dir)
+            print(f"{src} -> {path} ({n} samples)")
+    elif args.cmd == 'query':
+        store = HistoryStore.open(args.store)
+        stop = store.count if args.stop is None else args.stop
+        for c, lo, hi, mean in zip(*store.query(args.channel, args.start, stop, args.cols)):
+            i = args.start + c * (stop - args.start) // args.cols
+            print(f"{i:>12} {store.time_at(i) - store.meta['mono_t0']:>12.3f}s {lo:>12.3f} {hi:>12.3f} {mean:>12.3f}")
+    else:
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            store = HistoryStore(os.path.join(tmp, 'bench' + HIST_EXT), writable=True)
+            rng = np.random.default_rng(1)
+            t0 = time.perf_counter()
+            for i in range(0, args.samples, 1 << 16):
+                m = min(1 << 16, args.samples - i)
+                cols = {ch: rng.random(m, dtype=np.float32) * 20 for ch in store.channels}
+                store.extend(np.arange(i, i + m) * 1e-3, cols)
+            store.flush()
+            print(f"append  {args.samples / (time.perf_counter() - t0):14,.0f} samples/s", file=sys.stderr)
+            for span in (1000, 100_000, args.samples // 10, args.samples):
+                t0, reps = time.perf_counter(), 20
+                for r in range(reps): store.query('curr', args.samples - span - r, args.samples - r, args.cols)
+                print(f"query span {span:>12,} -> {args.cols} cols  {(time.perf_counter() - t0) / reps * 1e3:8.3f} ms",
+                      file=sys.stderr)
+            store.close()
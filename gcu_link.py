@@ -0,0 +1,96 @@
+import time
+from collections import deque
+from gcu_protocol import PACKET_SIZE, LINK_TIMEOUT
+
+BIN_S = 0.1
+GAP_FACTOR = 4.0            # an arrival gap this many frame periods long counts as a gap
+
+class LinkMonitor:
+    def __init__(self, timeout=LINK_TIMEOUT, window_s=5.0):
+        self.timeout = timeout
+        self.window_s = window_s
+        self.up = None
+        self.last_rx = 0.0
+        self.changed_at = 0.0
+        self.ups = 0
+        self.downs = 0
+        self.period = 0.0
+        self.interval = 0.0
+        self.jitter = 0.0
+        self.gaps = 0
+        self.frames = 0
+        self.crc_errors = 0
+        self.lost_bytes = 0
+        self.last_crc = 0
+        self.last_discarded = 0
+        # rolling window of BIN_S bins: [t_bin, frames, crc_errors, lost_bytes, gaps]
+        self.bins = deque(maxlen=max(1, int(window_s / BIN_S)))
+
+    def reset(self, now):
+        self.up = None
+        self.last_rx = now
+        self.last_crc = self.last_discarded = 0
+        self.bins.clear()
+
+    def _bin(self, now):
+        t = now - now % BIN_S
+        if not self.bins or self.bins[-1][0] != t: self.bins.append([t, 0, 0, 0, 0])
+        return self.bins[-1]
+
+    def on_frames(self, now, n):
+        b = self._bin(now)
+        b[1] += n
+        self.frames += n
+        if self.up and self.last_rx:
+            # RFC 3550-style jitter on read arrivals, normalised by the frames each read carried
+            dt = now - self.last_rx
+            expect = n * self.period
+            if self.period and dt > GAP_FACTOR * max(expect, self.period): b[4] += 1; self.gaps += 1
+            else:
+                self.period += (dt / n - self.period) / 16 if self.period else dt / n
+                self.interval += (dt - self.interval) / 16 if self.interval else dt
+                self.jitter += (abs(dt - expect) - self.jitter) / 16
+        self.last_rx = now
+        if self.up: return False
+        self.up = True; self.ups += 1; self.changed_at = now
+        return True
+
+    def on_counters(self, now, crc_errors, discarded):
+        d_crc, d_disc = crc_errors - self.last_crc, discarded - self.last_discarded
+        if d_crc < 0 or d_disc < 0: d_crc, d_disc = max(0, crc_errors), max(0, discarded)
+        self.last_crc, self.last_discarded = crc_errors, discarded
+        if d_crc or d_disc:
+            b = self._bin(now)
+            b[2] += d_crc; b[3] += d_disc
+            self.crc_errors += d_crc; self.lost_bytes += d_disc
+
+    def check(self, now):
+        return now - self.last_rx > self.timeout and self.drop(now)
+
+    def drop(self, now):
+        if self.up is False: return False
+        self.up = False; self.downs += 1; self.changed_at = now
+        self.period = self.interval = 0.0
+        return True
+
+    def deadline(self):
+        return self.last_rx + self.timeout if self.up is not False else None
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        bins = [b for b in list(self.bins) if b[0] >= now - self.window_s]
+        span = min(self.window_s, now - bins[0][0]) if bins else 0.0
+        frames = sum(b[1] for b in bins)
+        crc = sum(b[2] for b in bins)
+        lost = max(sum(b[3] for b in bins) // PACKET_SIZE, crc)    # a corrupted frame shows up in both
+        gaps = sum(b[4] for b in bins)
+        rate = frames / span if span > 0 else 0.0
+        loss = lost / (frames + lost) if frames + lost else 0.0
+        jitter_ratio = self.jitter / self.interval if self.interval else 0.0
+        # 100 = every expected frame arrives intact with steady spacing; each factor is in (0, 1]
+        if not self.up: health = 0.0
+        else:
+            health = 100.0 * (1.0 - loss) / (1.0 + jitter_ratio) / (1.0 + gaps / max(1.0, span))
+        return {'up': bool(self.up), 'health': health, 'rate': rate, 'loss': loss, 'crc_rate': crc / span if span > 0 else 0.0,
+                'gaps': gaps, 'jitter_ms': self.jitter * 1e3, 'period_ms': self.period * 1e3,
+                'ups': self.ups, 'downs': self.downs, 'since': now - self.changed_at if self.changed_at else 0.0}
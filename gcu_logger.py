@@ -0,0 +1,218 @@
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import struct
+import threading
+from array import array
+from datetime import datetime
+from gcu_protocol import (FULL_TLM_FMT, PACKET_SIZE, TLM_FIELDS, TLM_TYPECODES, TLM_CODEC, REC_FMT, REC_HEAD,
+                          REC_STRUCT, Codec, TelemetryBatch)
+
+LOG_MAGIC = b'GCUL'
+LOG_VERSION = 1
+LOG_EXT = '.gcul'
+HDR_STRUCT = struct.Struct('<4sHI')
+
+def log_header(wall_t0, mono_t0, **extra):
+    meta = json.dumps({'tlm_fmt': FULL_TLM_FMT, 'rec_fmt': REC_FMT, 'fields': TLM_FIELDS,
+                       'packet_size': PACKET_SIZE, 'wall_t0': wall_t0, 'mono_t0': mono_t0, **extra}).encode()
+    return HDR_STRUCT.pack(LOG_MAGIC, LOG_VERSION, len(meta)) + meta
+
+def read_header(f):
+    raw = f.read(HDR_STRUCT.size)
+    if len(raw) < HDR_STRUCT.size: raise ValueError("truncated log header")
+    magic, version, meta_len = HDR_STRUCT.unpack(raw)
+    if magic != LOG_MAGIC: raise ValueError("not a GCU binary log")
+    if version > LOG_VERSION: raise ValueError(f"unsupported log version {version}")
+    return json.loads(f.read(meta_len))
+
+class TelemetryLogger:
+    def __init__(self, directory=".", prefix="log_", max_bytes=64 << 20, max_seconds=3600.0,
+                 queue_size=512, flush_interval=1.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.flush_interval = flush_interval
+        self.q = queue.Queue(maxsize=queue_size)
+        self.file = None
+        self.path = None
+        self.paths = []
+        self.file_bytes = 0
+        self.opened_at = 0.0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.thread = None
+
+    def start(self):
+        if self.thread and self.thread.is_alive(): return
+        self.thread = threading.Thread(target=self.run, name="gcu-logger", daemon=True)
+        self.thread.start()
+
+    def submit(self, batch):
+        if not batch: return True
+        try:
+            self.q.put_nowait(batch)
+            return True
+        except queue.Full:
+            self.dropped += len(batch)
+            return False
+
+    def close(self, timeout=5.0):
+        if not self.thread: return
+        while True:
+            try: self.q.put(None, timeout=timeout); break
+            except queue.Full:
+                try: self.dropped += len(self.q.get_nowait() or ())
+                except queue.Empty: pass
+        self.thread.join(timeout)
+        self.thread = None
+
+    @property
+    def queue_depth(self):
+        return self.q.qsize()
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped, 'errors': self.errors,
+                'queue_depth': self.queue_depth, 'files': len(self.paths), 'path': self.path}
+
+    def run(self):
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try: batch = self.q.get(timeout=self.flush_interval)
+                except queue.Empty: batch = ()
+                if batch is None: break
+                if batch:
+                    try: self.write_batch(batch)
+                    except OSError: self.errors += 1; self.dropped += len(batch)
+                now = time.monotonic()
+                if self.file and now - last_flush >= self.flush_interval:
+                    self.file.flush(); last_flush = now
+        finally:
+            self._close_file()
+
+    def write_batch(self, batch):
+        now = time.monotonic()
+        if self.file is None or self.file_bytes >= self.max_bytes or now - self.opened_at >= self.max_seconds:
+            self._open_file(now)
+        pack = REC_STRUCT.pack
+        blob = b''.join([pack(t, *row) for row, t in zip(batch.rows, batch.times)])
+        self.file.write(blob)
+        self.file_bytes += len(blob)
+        self.written += len(batch)
+
+    def _open_file(self, now):
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"{self.prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        path, n = stem + LOG_EXT, 1
+        while os.path.exists(path):
+            path = f"{stem}_{n:03d}{LOG_EXT}"; n += 1
+        self.file = open(path, 'wb')
+        hdr = log_header(time.time(), now)
+        self.file.write(hdr)
+        self.file_bytes = len(hdr)
+        self.opened_at = now
+        self.path = path
+        self.paths.append(path)
+
+    def _close_file(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+def iter_log(path, chunk_records=8192):
+    with open(path, 'rb') as f:
+        meta = read_header(f)
+        if meta['tlm_fmt'] != FULL_TLM_FMT: raise ValueError(f"log format {meta['tlm_fmt']} != {FULL_TLM_FMT}")
+        rec = struct.Struct(meta['rec_fmt'])
+        while True:
+            raw = f.read(rec.size * chunk_records)
+            usable = len(raw) - len(raw) % rec.size
+            if not usable: break
+            rows, times = [], array('d')
+            for val in rec.iter_unpack(memoryview(raw)[:usable]):
+                times.append(val[0]); rows.append(val[1:])
+            yield meta, TelemetryBatch(rows, times)
+            if usable < len(raw): break
+
+def log_codec(meta):
+    if meta['rec_fmt'] == REC_FMT and tuple(meta['fields']) == TLM_FIELDS: return TLM_CODEC, REC_HEAD
+    return Codec.from_format(meta['rec_fmt'], ['t_mono'] + list(meta['fields'])), ()
+
+def iter_records(path, chunk_records=1 << 18):
+    # NumPy structured chunks straight from the file; older record layouts are decoded from the header's rec_fmt
+    with open(path, 'rb') as f:
+        meta = read_header(f)
+        codec, head = log_codec(meta)
+        size = codec.dtype(head).itemsize
+        while True:
+            raw = f.read(size * chunk_records)
+            usable = len(raw) - len(raw) % size
+            if not usable: break
+            yield meta, codec.frombuffer(raw, head, count=usable // size)
+            if usable < len(raw): break
+
+def load_log(path):
+    import numpy as np
+    with open(path, 'rb') as f:
+        meta = read_header(f)
+        offset = f.tell()
+    codec, head = log_codec(meta)
+    dt = codec.dtype(head)
+    n = (os.path.getsize(path) - offset) // dt.itemsize
+    if not n: return meta, np.empty(0, dt)
+    return meta, np.memmap(path, dt, 'r', offset, (n,))
+
+def to_csv(path, out_path):
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    n = 0
+    with open(out_path, 'w', newline='') as out:
+        w = csv.writer(out)
+        for meta, batch in iter_log(path):
+            if not n: w.writerow(tuple(meta['fields']) + ('pc_time', 't_mono'))
+            offset = meta['wall_t0'] - meta['mono_t0']
+            w.writerows(row + (datetime.fromtimestamp(t + offset).strftime('%H:%M:%S.%f'), f"{t:.6f}")
+                        for row, t in zip(batch.rows, batch.times))
+            n += len(batch)
+    return n
+
+def to_columns(path, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    files, n, meta = {}, 0, None
+    try:
+        for meta, rec in iter_records(path):
+            if not files:
+                files = {name: open(os.path.join(out_dir, name + '.bin'), 'wb') for name in rec.dtype.names}
+            for name in rec.dtype.names: rec[name].astype(rec.dtype[name].newbyteorder('=')).tofile(files[name])
+            n += len(rec)
+    finally:
+        for f in files.values(): f.close()
+    if meta is None:
+        with open(path, 'rb') as f: meta = read_header(f)
+    schema = {'rows': n, 'source': os.path.basename(path), 'wall_t0': meta['wall_t0'], 'mono_t0': meta['mono_t0'],
+              'columns': [{'name': name, 'typecode': tc, 'itemsize': array(tc).itemsize, 'file': name + '.bin'}
+                          for name, tc in zip(meta['fields'], TLM_TYPECODES)] +
+                         [{'name': 't_mono', 'typecode': 'd', 'itemsize': 8, 'file': 't_mono.bin'}],
+              'byteorder': sys.byteorder}
+    with open(os.path.join(out_dir, 'schema.json'), 'w') as f: json.dump(schema, f, indent=1)
+    return n
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Convert GCU binary telemetry logs")
+    ap.add_argument('logs', nargs='+')
+    ap.add_argument('--format', choices=('csv', 'columns'), default='csv')
+    ap.add_argument('-o', '--out-dir', default=None)
+    args = ap.parse_args()
+    for src in args.logs:
+        base = os.path.splitext(os.path.basename(src))[0]
+        dst_dir = args.out_dir or os.path.dirname(src) or '.'
+        if args.format == 'csv': dst = os.path.join(dst_dir, base + '.csv'); rows = to_csv(src, dst)
+        else: dst = os.path.join(dst_dir, base + '_cols'); rows = to_columns(src, dst)
+        print(f"{src} -> {dst} ({rows} rows)")
@@ -1,51 +1,203 @@
+import os
 import sys
-import struct
+import json
 import time
-import serial
-import serial.tools.list_ports
-import csv
-from datetime import datetime
+import argparse
+import queue
 from collections import deque
+import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QGroupBox, QLabel, QComboBox, 
                              QPushButton, QGridLayout, QSpinBox, 
-                             QRadioButton, QButtonGroup, QCheckBox, QFrame)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer
-from PyQt5.QtGui import QPainter, QPen, QColor, QPainterPath, QFont
-
-CMD_HEADER = 0xA5
-TLM_HEADER = 0x55
-BAUD_RATE = 460800
-CMD_FMT = '<BBHBIIIIBBBBBHBBB' 
-PACKET_SIZE = 68
-FULL_TLM_FMT = '<BBBHHfIIIIBBBBIIIIBBBBBHHIIH'
-
-def calc_crc16(data):
-    crc = 0xFFFF
-    for byte in data:
-        crc ^= (byte << 8)
-        for _ in range(8):
-            if crc & 0x8000: crc = (crc << 1) ^ 0x1021
-            else: crc <<= 1
-        crc &= 0xFFFF
-    return crc
+                             QRadioButton, QButtonGroup, QCheckBox, QFrame, QListWidget)
+from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF, QFont
+from gcu_core import CommsCore
+from gcu_logger import TelemetryLogger
+from gcu_history import HistoryStore
+from gcu_events import EventLog, format_event, EV_ERROR_ENTER, EV_ERROR_EXIT, EV_MISFIRE, EV_SUCCESS, EV_LINK
+from gcu_replay import default_recording_path
+from gcu_ports import PortWatcher
+from gcu_scope import Scope, DEFAULT_TRIGGERS, list_snapshots, load_snapshot
+from gcu_stats import STATS, format_snapshot
+
+STATE_TEXT = {0:"UNK", 1:"READY LOAD", 2:"READY FIRE", 3:"LOAD(EXT)", 4:"WAIT", 5:"LOAD(RET)", 6:"FIRING", 7:"MAN EXT", 8:"MAN RET", 10: "ERR: OVC", 11: "ERR: LVDT", 12:"JAMMED", 13:"EMPTY"}
+C_OK, C_FIRE, C_ERR, C_BUSY, C_IDLE = "#76FF03", "#FFEB3B", "#FF3D00", "#00E5FF", "#F0F0F0"
+
+def state_color(st):
+    if st in (1, 2): return C_OK
+    if st == 6: return C_FIRE
+    if st >= 10: return C_ERR
+    if st in (3, 4, 5): return C_BUSY
+    return C_IDLE
+
+ST_OFFLINE_STYLE = "background: #F0F0F0; color: #000000; font-size: 24pt; font-weight: 900; border: 3px solid #000000;"
+ST_NOLINK_STYLE = "background: #000000; color: #FF3D00; font-weight: 900; font-size: 24pt; border: 3px solid #FF3D00;"
+ST_STYLES = {c: f"background: {c}; color: black; font-weight: 900; font-size: 24pt; border: 3px solid black;"
+             for c in (C_OK, C_FIRE, C_ERR, C_BUSY, C_IDLE)}
+STATE_VIEW = tuple((STATE_TEXT.get(st, f"STATE {st}"), ST_STYLES[state_color(st)]) for st in range(256))
+ACK_ON_STYLE = "background: #76FF03; color: black; font-weight: bold; border: 3px solid black;"
+ACK_OFF_STYLE = "background: #F0F0F0; border: 3px solid #000000;"
+LINK_STYLES = {c: f"background: {c}; color: black; font-weight: bold; border: 3px solid black;" for c in (C_OK, C_FIRE, C_ERR)}
+LED_OFF_STYLE = "background: #FFFFFF; color: #F0F0F0; font-weight: bold; border: 2px solid #000000; min-width: 50px; padding: 5px;"
+LED_ON_STYLES = {c: f"background: {c}; color: black; font-weight: bold; border: 2px solid #000000; min-width: 50px; padding: 5px;"
+                 for c in (C_OK, C_ERR)}
+
+class ViewCache:
+    def __init__(self):
+        self.last = {}
+        self.applied = 0
+        self.skipped = 0
+
+    def text(self, w, value):
+        key = (w, 0)
+        if self.last.get(key) == value: self.skipped += 1; return
+        self.last[key] = value; self.applied += 1
+        w.setText(value)
+
+    def style(self, w, value):
+        key = (w, 1)
+        if self.last.get(key) == value: self.skipped += 1; return
+        self.last[key] = value; self.applied += 1
+        w.setStyleSheet(value)
+
+    def led(self, w, on, c=C_OK):
+        self.style(w, LED_ON_STYLES[c] if on else LED_OFF_STYLE)
+
+GRAPH_FPS = 30
+GRAPH_SAMPLES = 8192
+
+def minmax_columns(y, cols):
+    starts = (np.arange(cols) * len(y)) // cols
+    ys = np.empty(cols * 2, dtype=np.float64)
+    ys[0::2] = np.minimum.reduceat(y, starts)
+    ys[1::2] = np.maximum.reduceat(y, starts)
+    return np.repeat(np.arange(cols, dtype=np.float64), 2), ys
 
 class RealTimeGraph(QFrame):
-    def __init__(self, max_val=20.0, line_color=QColor(0, 0, 0), title="", parent=None):
+    def __init__(self, max_val=20.0, line_color=QColor(0, 0, 0), title="", capacity=300, parent=None,
+                 history=None, channel=None, stats_prefix='ui'):
         super().__init__(parent)
         self.setFrameStyle(QFrame.Box | QFrame.Plain)
         self.setStyleSheet("background: #FFFFFF; border: 3px solid #000000;")
-        self.data = deque([0.0] * 300, maxlen=300) 
+        self.ring = np.zeros(capacity, dtype=np.float32)
+        self.head = 0
+        self.dirty = False
+        self.poly = None
+        self.poly_pts = None
+        self.data_t = None
+        # secondary graphs pass stats_prefix=None so they do not mix into the main plot's paint stats
+        self.h_paint = STATS.histogram(f"{stats_prefix}.paint_time") if stats_prefix else None
+        self.h_latency = STATS.histogram(f"{stats_prefix}.paint_latency") if stats_prefix else None
         self.max_val = max_val
         self.line_color = line_color
         self.title = title
+        self.history = history
+        self.channel = channel
+        self.span = None            # samples shown from the history store, None = live ring
+        self.view_stop = None       # end of the history window, None = follow the newest sample
+        self.drag = None
         self.setMinimumHeight(150)
+        self.repaint_timer = QTimer(self)
+        self.repaint_timer.timeout.connect(self.flush)
+        self.repaint_timer.start(1000 // GRAPH_FPS)
 
     def add_value(self, val):
-        self.data.append(val)
+        self.ring[self.head] = val
+        self.head = (self.head + 1) % len(self.ring)
+        self.dirty = True
+
+    def add_values(self, vals, t=None):
+        if t is not None: self.data_t = t
+        a = np.asarray(vals, dtype=np.float32)
+        n, cap = len(a), len(self.ring)
+        if not n: return
+        if n >= cap:
+            self.ring[:] = a[-cap:]; self.head = 0
+        else:
+            end = self.head + n
+            if end <= cap: self.ring[self.head:end] = a
+            else:
+                k = cap - self.head
+                self.ring[self.head:] = a[:k]; self.ring[:end - cap] = a[k:]
+            self.head = end % cap
+        self.dirty = True
+
+    def flush(self):
+        if self.dirty:
+            self.dirty = False
+            self.update()
+
+    def samples(self):
+        return np.concatenate((self.ring[self.head:], self.ring[:self.head]))
+
+    def latest(self):
+        return float(self.ring[self.head - 1])
+
+    def window(self):
+        end = len(self.history)
+        stop = end if self.view_stop is None else min(self.view_stop, end)
+        return max(0, stop - self.span), stop
+
+    def set_window(self, start, span):
+        end = len(self.history)
+        span = int(min(max(span, 64), max(end, 64)))
+        start = int(min(max(start, 0), max(0, end - span)))
+        self.span = span
+        self.view_stop = None if start + span >= end else start + span
+        self.update()
+
+    def show_history(self, span=None):
+        if self.history is None: return
+        end = len(self.history)
+        self.set_window(0 if span is None else end - span, end if span is None else span)
+
+    def wheelEvent(self, event):
+        if self.history is None or not len(self.history): return
+        if self.span is None: self.span = len(self.ring); self.view_stop = None
+        start, stop = self.window()
+        fx = min(max(event.pos().x() / max(1, self.width()), 0.0), 1.0)
+        anchor = start + (stop - start) * fx
+        span = self.span * (0.5 if event.angleDelta().y() > 0 else 2.0)
+        self.set_window(anchor - span * fx, span)
+
+    def mousePressEvent(self, event):
+        if self.span is not None and event.button() == Qt.LeftButton:
+            self.drag = (event.pos().x(), self.window()[0])
+
+    def mouseMoveEvent(self, event):
+        if self.drag is None: return
+        x0, start0 = self.drag
+        self.set_window(start0 - (event.pos().x() - x0) * self.span / max(1, self.width()), self.span)
+
+    def mouseReleaseEvent(self, event):
+        self.drag = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.span = self.view_stop = None
         self.update()
 
+    def history_columns(self, w):
+        start, stop = self.window()
+        cols, lo, hi, _ = self.history.query(self.channel, start, stop, max(1, w))
+        ys = np.empty(len(cols) * 2, dtype=np.float64)
+        ys[0::2] = lo; ys[1::2] = hi
+        return np.repeat(cols.astype(np.float64), 2), ys, start, stop
+
+    def polygon(self, n):
+        if self.poly_pts is None or len(self.poly_pts) != n:
+            self.poly = QPolygonF()
+            self.poly.fill(QPointF(), n)
+            ptr = self.poly.data()
+            ptr.setsize(n * 16)
+            self.poly_pts = np.frombuffer(ptr, dtype=np.float64).reshape(n, 2)
+        return self.poly, self.poly_pts
+
     def paintEvent(self, event):
+        t0 = time.monotonic()
+        if self.data_t is not None:
+            if self.h_latency: self.h_latency.observe(t0 - self.data_t)
+            self.data_t = None
         p = QPainter(self)
         p.setRenderHint(QPainter.Antialiasing)
         w, h = self.width(), self.height()
@@ -59,151 +211,176 @@ class RealTimeGraph(QFrame):
         p.setPen(QPen(QColor("#000000"), 1, Qt.DashLine))
         p.drawLine(0, int(h/2), w, int(h/2))
 
-        path = QPainterPath()
-        scale_x = w / (len(self.data) - 1) if len(self.data) > 1 else 1
         scale_y = h / self.max_val if self.max_val > 0 else 1
-
-        path.moveTo(0, h - (self.data[0] * scale_y))
-        for i, val in enumerate(self.data):
-            x = i * scale_x
-            y = h - (val * scale_y)
-            path.lineTo(x, max(0, min(h, y)))
+        if self.span is not None:
+            xs, ys, start, stop = self.history_columns(w)
+            n = len(ys)
+        else:
+            y = self.samples()
+            n = len(y)
+            if w > 1 and n > 2 * w: xs, ys = minmax_columns(y, w)
+            else: xs, ys = np.arange(n) * (w / (n - 1) if n > 1 else 1), y
+
+        # drawLines on vertex pairs: a wide antialiased drawPolyline strokes one joined path
+        # and gets orders of magnitude slower on noisy or decimated traces
+        ys = np.clip(h - ys * scale_y, 0, h)
+        poly, pts = self.polygon(max(0, 2 * (len(xs) - 1)))
+        pts[0::2, 0] = xs[:-1]; pts[0::2, 1] = ys[:-1]
+        pts[1::2, 0] = xs[1:]; pts[1::2, 1] = ys[1:]
 
         p.setPen(QPen(self.line_color, 3))
         p.setBrush(Qt.NoBrush)
-        p.drawPath(path)
+        p.drawLines(poly)
 
-        if self.data:
-            val_str = f"{self.data[-1]:.1f}"
+        if n:
+            val_str = f"{self.latest():.1f}"
             p.fillRect(w - 70, 10, 60, 25, QColor("#000000"))
             p.setPen(QColor("#FFFFFF"))
             p.setFont(QFont("Consolas", 12, QFont.Bold))
             p.drawText(w - 65, 27, val_str)
-
-class CommsThread(QThread):
-    telemetry_signal = pyqtSignal(dict)
+        if self.span is not None:
+            h0 = self.history.time_at(start); h1 = self.history.time_at(stop - 1)
+            t_end = self.history.time_at(len(self.history) - 1)
+            live = "LIVE" if self.view_stop is None else f"-{t_end - h1:.1f}s"
+            p.setPen(QColor("#000000"))
+            p.setFont(QFont("Consolas", 8))
+            p.drawText(15, h - 8, f"HIST {h1 - h0:.1f}s  {live}")
+        p.end()
+        if self.h_paint: self.h_paint.observe(time.monotonic() - t0)
+
+class CommsThread(QThread, CommsCore):
+    telemetry_signal = pyqtSignal(object)
+    link_signal = pyqtSignal(bool)
     connection_signal = pyqtSignal(bool)
+    events_signal = pyqtSignal(object)
 
-    def __init__(self):
+    def __init__(self, emit_interval=0.030, io_mode='event'):
+        super().__init__(emit_interval=emit_interval, io_mode=io_mode)
+
+    run = CommsCore.run
+
+    def emit_telemetry(self, batch): self.telemetry_signal.emit(batch)
+    def emit_link(self, up): self.link_signal.emit(up)
+    def emit_connection(self, ok): self.connection_signal.emit(ok)
+    def emit_events(self, events): self.events_signal.emit(events)
+
+# Shows a whole saved scope window at full rate, with the trigger frame and any later marks as vertical lines
+class ScopeGraph(RealTimeGraph):
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.setMinimumHeight(120)
+        self.marks = ()
+
+    def set_snapshot(self, vals, trigger_index, marks=()):
+        self.ring = np.asarray(vals, dtype=np.float32)
+        self.head = 0
+        self.marks = ((trigger_index, C_ERR),) + tuple((k, C_BUSY) for k in marks)
+        self.update()
+
+    def latest(self):
+        return float(self.ring[self.marks[0][0]]) if self.marks and self.marks[0][0] < len(self.ring) else 0.0
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        n = len(self.ring)
+        if n < 2: return
+        p = QPainter(self)
+        w, h = self.width(), self.height()
+        for k, color in self.marks:
+            x = int(k * w / (n - 1))
+            p.setPen(QPen(QColor(color), 2, Qt.DashLine))
+            p.drawLine(x, 0, x, h)
+        p.end()
+
+class ScopeWindow(QWidget):
+    def __init__(self, directory="."):
         super().__init__()
-        self.port_name = ""
-        self.running = False
-        self.last_rx_time = 0
-        self.cmd_enable = False
-        self.cmd_safety = True
-        self.cmd_load = False
-        self.cmd_fire = False
-        self.cmd_manual = 0
-        self.cmd_bypass = False
-        self.cmd_reset_cycle = False
-        self.req_set_ammo = 0 
-        self.mode = 0
-        self.burst = 1
-        self.timings = [35, 80, 450, 10000]
-        self.seq = 0
-
-    def start_comms(self, port):
-        self.port_name = port
-        self.running = True
-        self.start()
-
-    def stop_comms(self):
-        self.running = False
-        self.wait()
-
-    def run(self):
-        ser = None
-        try:
-            ser = serial.Serial(self.port_name, BAUD_RATE, timeout=0.002, write_timeout=0)
-            self.connection_signal.emit(True)
-        except Exception as e:
-            self.connection_signal.emit(False)
+        self.setWindowTitle("GCU SCOPE // SNAPSHOTS")
+        self.resize(1100, 800)
+        self.setStyleSheet("QWidget { background: #F0F0F0; font-family: 'Consolas', monospace; font-weight: bold; }")
+        self.directory = directory
+        layout = QHBoxLayout(self)
+        self.list = QListWidget(); self.list.setFixedWidth(330)
+        self.list.currentRowChanged.connect(lambda row: self.show_snapshot(self.paths[row] if 0 <= row < len(self.paths) else None))
+        self.paths = []
+        right = QVBoxLayout()
+        self.lbl_info = QLabel("")
+        right.addWidget(self.lbl_info)
+        self.graphs = []
+        for ch, top, color, title in (('curr', 20.0, "#00E5FF", "CURRENT (A)"), ('pos', 65535.0, "#FF4081", "LVDT POS"),
+                                      ('p1', 2.0, "#76FF03", "SENS P1"), ('p2', 2.0, "#9C27B0", "SENS P2")):
+            g = ScopeGraph(max_val=top, line_color=QColor(color), title=title, capacity=2, stats_prefix=None)
+            right.addWidget(g)
+            self.graphs.append((ch, g))
+        layout.addWidget(self.list); layout.addLayout(right, 1)
+        self.refresh()
+
+    def refresh(self):
+        row = self.list.currentRow()
+        current = self.paths[row] if 0 <= row < len(self.paths) else None
+        self.paths = paths = list_snapshots(self.directory)
+        self.list.blockSignals(True)
+        self.list.clear()
+        self.list.addItems([os.path.basename(p) for p in paths])
+        self.list.blockSignals(False)
+        if current in paths: self.list.setCurrentRow(paths.index(current))
+        elif paths: self.list.setCurrentRow(len(paths) - 1)
+
+    def show_snapshot(self, path):
+        if not path: return
+        try: meta, rec = load_snapshot(path)
+        except (OSError, ValueError) as e:
+            self.lbl_info.setText(f"{path}: {e}")
             return
-
-        rx_buffer = bytearray()
-        last_tx_time = 0
-        self.last_rx_time = time.time()
-
-        while self.running:
-            try:
-                now = time.time()
-                if now - self.last_rx_time > 1.0:
-                    self.telemetry_signal.emit({'timeout': True})
-                
-                if now - last_tx_time >= 0.005:
-                    self.seq = (self.seq + 1) & 0xFFFF
-                    ammo_to_send = self.req_set_ammo
-                    self.req_set_ammo = 0 
-
-                    try:
-                        pkt = struct.pack(CMD_FMT,
-                            CMD_HEADER, 1, self.seq, self.mode,
-                            self.timings[0], self.timings[1], self.timings[2], self.timings[3],
-                            1 if self.cmd_safety else 0, 1 if self.cmd_load else 0, 1 if self.cmd_fire else 0,
-                            self.cmd_manual, self.burst, ammo_to_send, 
-                            1 if self.cmd_enable else 0, 1 if self.cmd_bypass else 0, 1 if self.cmd_reset_cycle else 0
-                        )
-                        crc = calc_crc16(pkt)
-                        ser.write(pkt + struct.pack('<H', crc))
-                        last_tx_time = now
-                    except Exception:
-                        pass
-
-                if ser.in_waiting:
-                    chunk = ser.read(ser.in_waiting)
-                    rx_buffer.extend(chunk)
-                    while len(rx_buffer) >= PACKET_SIZE:
-                        try: idx = rx_buffer.index(TLM_HEADER)
-                        except ValueError: rx_buffer = bytearray(); break
-                        if idx > 0: del rx_buffer[:idx]; continue
-                        if len(rx_buffer) < PACKET_SIZE: break
-                        
-                        raw_pkt = rx_buffer[:PACKET_SIZE]
-                        payload = raw_pkt[:-2]
-                        rcv_crc = struct.unpack('<H', raw_pkt[-2:])[0]
-                        calc = calc_crc16(payload)
-
-                        if calc == rcv_crc:
-                            self.last_rx_time = time.time()
-                            try:
-                                data = self.parse_fast(payload)
-                                self.telemetry_signal.emit(data)
-                            except Exception: pass
-                            del rx_buffer[:PACKET_SIZE]
-                        else: del rx_buffer[0:1] 
-
-            except Exception: pass
-            self.usleep(100) 
-
-        if ser and ser.is_open: ser.close()
-        self.connection_signal.emit(False)
-
-    def parse_fast(self, payload):
-        val = struct.unpack(FULL_TLM_FMT, payload)
-        return {
-            'timeout': False,
-            'header': val[0], 'state': val[1], 'err': val[2], 'mag_rem': val[3], 'burst_fired': val[4], 'curr': val[5],
-            'cur_t1': val[6], 'cur_t2': val[7], 'cur_t3': val[8], 'cur_t4': val[9],
-            'lvdt_header': val[10], 'mode_flags': val[11], 'b_cnt_lvdt': val[12], 'b_rem_lvdt': val[13],
-            't_recv': val[14], 't_free': val[15], 't_chamb': val[16], 't_shock': val[17],
-            'p1': val[18], 'p2': val[19], 'success': val[20], 'misfire': val[21], 'out': val[22], 'pos': val[23], 'lvdt_crc': val[24],
-            'count_miss': val[25], 'timing_sum': val[26], 'ack_flags': val[27]
-        }
+        i = meta['trigger_index']
+        t = rec['t_mono'] - meta['mono_t0']
+        span = f"{t[0] * 1e3:+.0f} .. {t[-1] * 1e3:+.0f} ms" if len(t) else "empty"
+        marks = meta['marks']
+        self.lbl_info.setText(f"{meta['condition']}  {time.strftime('%H:%M:%S', time.localtime(meta['wall_t0']))}  "
+                              f"{len(rec)} frames  {span}" + (f"  +{', '.join(name for _, name in marks)}" if marks else ""))
+        for ch, g in self.graphs:
+            g.set_snapshot(rec[ch], i, [k for k, _ in marks])
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    ports_signal = pyqtSignal(object)
+    scope_signal = pyqtSignal(object)
+
+    def __init__(self, io_mode='event', hud=False, stats_file=None, history=None, triggers=None, record_history=False,
+                 port=None):
         super().__init__()
         self.setWindowTitle("GCU CONTROL // NEO-BRUTAL")
         self.resize(1280, 950)
         
-        self.thread = CommsThread()
+        self.thread = CommsThread(io_mode=io_mode)
         self.thread.telemetry_signal.connect(self.update_ui)
+        self.thread.link_signal.connect(self.on_link)
         self.thread.connection_signal.connect(self.on_conn)
+        self.thread.events_signal.connect(self.on_events)
         
-        self.init_csv_logging()
+        self.view = ViewCache()
+        self.stats_file = stats_file
+        self.history_path = history
+        self.record_history = record_history
+        self.port = port
+        self.triggers = triggers or DEFAULT_TRIGGERS
+        self.scope_win = None
+        self.h_signal = STATS.histogram('ui.signal_latency')
+        self.h_update = STATS.histogram('ui.update_time')
+        self.c_dropped_draws = STATS.counter('ui.draws_dropped')
+        STATS.gauge('ui.widget_skipped', lambda: self.view.skipped, rate=True)
+        self.init_logging()
         self.init_ui()
         self.apply_style()
-        self.refresh_ports()
+        self.ports = PortWatcher()
+        self.ports.subscribe(self.on_ports)
+        self.ports_signal.connect(self.update_ports)
+        self.ports.start()
+        STATS.gauge('ports.scan_ms', lambda: round(self.ports.scan_s * 1e3, 2))
+        self.ck_hud.setChecked(hud); self.g_hud.setVisible(hud)
+
+        self.hud_tmr = QTimer()
+        self.hud_tmr.timeout.connect(self.update_hud)
+        self.hud_tmr.start(1000)
 
         self.tmr = QTimer()
         self.tmr.timeout.connect(self.sync_data)
@@ -211,20 +388,36 @@ class MainWindow(QMainWindow):
         
         self.last_draw_time = 0
 
-    def init_csv_logging(self):
-        filename = f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        self.csv_file = open(filename, 'w', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_header_written = False
-
-    def write_log(self, data):
-        if not self.csv_file: return
-        log_data = data.copy()
-        log_data['pc_time'] = datetime.now().strftime('%H:%M:%S.%f')
-        if not self.csv_header_written:
-            self.csv_writer.writerow(log_data.keys())
-            self.csv_header_written = True
-        self.csv_writer.writerow(log_data.values())
+    def init_logging(self):
+        self.logger = TelemetryLogger()
+        self.logger.start()
+        STATS.gauge('log.queue_depth', lambda: self.logger.queue_depth)
+        STATS.gauge('log.written', lambda: self.logger.written, rate=True)
+        STATS.gauge('log.dropped', lambda: self.logger.dropped, rate=True)
+        self.event_log = EventLog()
+        self.thread.events.subscribe(self.event_log.write)
+        self.recent_events = deque(maxlen=8)
+        self.events_t0 = None
+        self.events_dirty = False
+        self.n_errors = 0
+        self.n_misfires = 0
+        self.n_cycles = 0
+        self.history = None
+        if self.history_path: self.history = HistoryStore.open(self.history_path)
+        elif self.record_history:
+            self.history = HistoryStore.create()
+            self.history.start()
+            STATS.gauge('hist.samples', lambda: len(self.history), rate=True)
+            STATS.gauge('hist.dropped', lambda: self.history.dropped, rate=True)
+        self.scope = Scope(self.triggers)
+        self.scope.subscribe(lambda path, snap: self.scope_signal.emit(path))
+        self.scope_signal.connect(self.on_snapshot)
+        self.thread.scope = self.scope
+        STATS.gauge('scope.saved', lambda: self.scope.saved)
+        STATS.gauge('scope.dropped', lambda: self.scope.dropped)
+
+    def write_log(self, batch):
+        self.logger.submit(batch)
 
     def apply_style(self):
         c_bg = "#FFFFFF"       
@@ -373,10 +566,18 @@ class MainWindow(QMainWindow):
 
         g_con = QGroupBox("CONNECTION"); l_con = QHBoxLayout()
         self.cb_port = QComboBox(); self.cb_port.setMinimumHeight(30)
+        # editable, so transport specs the port watcher cannot list (sim:, tcp:, pty:) can be typed in
+        self.cb_port.setEditable(True); self.cb_port.setInsertPolicy(QComboBox.NoInsert)
+        self.cb_port.lineEdit().setPlaceholderText("serial, sim:k=v, tcp:HOST:PORT, pty:PATH")
+        if self.port: self.cb_port.setEditText(self.port)
         b_ref = QPushButton("R"); b_ref.setMaximumWidth(40); b_ref.clicked.connect(self.refresh_ports)
         self.b_con = QPushButton("CONNECT"); self.b_con.setCheckable(True); self.b_con.clicked.connect(self.toggle_con)
         l_con.addWidget(self.cb_port, 1); l_con.addWidget(b_ref); l_con.addWidget(self.b_con, 1)
-        g_con.setLayout(l_con); left.addWidget(g_con)
+        self.ck_rec = QCheckBox("RECORD RAW")
+        self.ck_hud = QCheckBox("PERF HUD")
+        h_opt = QHBoxLayout(); h_opt.addWidget(self.ck_rec); h_opt.addWidget(self.ck_hud)
+        v_con = QVBoxLayout(); v_con.addLayout(l_con); v_con.addLayout(h_opt)
+        g_con.setLayout(v_con); left.addWidget(g_con)
 
         g_mst = QGroupBox("MASTER CONTROL"); l_mst = QVBoxLayout()
         self.ck_en = QCheckBox("SYSTEM ENABLE")
@@ -423,8 +624,24 @@ class MainWindow(QMainWindow):
         l_man.addWidget(b_ext, 0, 0); l_man.addWidget(b_ret, 0, 1)
         l_man.addWidget(b_rst, 1, 0, 1, 2)
         g_man.setLayout(l_man); left.addWidget(g_man)
+
+        self.g_ev = QGroupBox("EVENTS"); l_ev = QVBoxLayout()
+        self.lbl_ev_count = QLabel("CYCLES 0  ERR 0  MISFIRE 0")
+        self.lbl_events = QLabel(""); self.lbl_events.setStyleSheet("font-size: 8pt; font-weight: normal;")
+        self.lbl_events.setAlignment(Qt.AlignLeft | Qt.AlignTop); self.lbl_events.setMinimumHeight(110)
+        self.b_scope = QPushButton("SCOPE (0)"); self.b_scope.clicked.connect(self.open_scope)
+        self.b_scope.setToolTip("triggers: " + ", ".join(map(repr, self.scope.triggers)))
+        l_ev.addWidget(self.lbl_ev_count); l_ev.addWidget(self.lbl_events); l_ev.addWidget(self.b_scope)
+        self.g_ev.setLayout(l_ev); left.addWidget(self.g_ev)
         left.addStretch()
 
+        self.g_hud = QGroupBox("PERF HUD"); l_hud = QVBoxLayout()
+        self.lbl_hud = QLabel(""); self.lbl_hud.setStyleSheet("font-size: 8pt; font-weight: normal;")
+        b_exp = QPushButton("EXPORT"); b_exp.clicked.connect(self.export_stats)
+        l_hud.addWidget(self.lbl_hud); l_hud.addWidget(b_exp)
+        self.g_hud.setLayout(l_hud); left.addWidget(self.g_hud)
+        self.ck_hud.toggled.connect(self.g_hud.setVisible)
+
         g_st = QGroupBox("STATUS MONITOR"); l_st = QHBoxLayout()
         self.lb_st = QLabel("OFFLINE"); self.lb_st.setAlignment(Qt.AlignCenter)
         self.lb_st.setStyleSheet("background: #F0F0F0; color: #000000; font-size: 24pt; font-weight: 900; border: 3px solid #000000;")
@@ -434,17 +651,28 @@ class MainWindow(QMainWindow):
         self.ind_ack.setFixedWidth(80)
         self.ind_ack.setStyleSheet("background: #F0F0F0; border: 3px solid #000000; font-weight: bold;")
 
-        l_st.addWidget(self.lb_st, 8); l_st.addWidget(self.ind_ack, 2)
+        self.ind_link = QLabel("LINK\n--")
+        self.ind_link.setAlignment(Qt.AlignCenter)
+        self.ind_link.setFixedWidth(90)
+        self.ind_link.setStyleSheet(ACK_OFF_STYLE)
+
+        l_st.addWidget(self.lb_st, 8); l_st.addWidget(self.ind_link, 2); l_st.addWidget(self.ind_ack, 2)
         g_st.setLayout(l_st); right.addWidget(g_st)
 
         g_gr = QGroupBox("VISUALIZATION"); l_gr = QGridLayout()
-        self.graph_curr = RealTimeGraph(max_val=20.0, line_color=QColor("#00E5FF"), title="CURRENT (A)")
-        self.graph_lvdt = RealTimeGraph(max_val=65535.0, line_color=QColor("#FF4081"), title="LVDT POS")
-        self.graph_p1 = RealTimeGraph(max_val=2.0, line_color=QColor("#76FF03"), title="SENS P1")
-        self.graph_p2 = RealTimeGraph(max_val=2.0, line_color=QColor("#9C27B0"), title="SENS P2")
+        self.graph_curr = RealTimeGraph(max_val=20.0, line_color=QColor("#00E5FF"), title="CURRENT (A)", capacity=GRAPH_SAMPLES,
+                                        history=self.history, channel='curr')
+        self.graph_lvdt = RealTimeGraph(max_val=65535.0, line_color=QColor("#FF4081"), title="LVDT POS", capacity=GRAPH_SAMPLES,
+                                        history=self.history, channel='pos')
+        self.graph_p1 = RealTimeGraph(max_val=2.0, line_color=QColor("#76FF03"), title="SENS P1", capacity=GRAPH_SAMPLES,
+                                      history=self.history, channel='p1')
+        self.graph_p2 = RealTimeGraph(max_val=2.0, line_color=QColor("#9C27B0"), title="SENS P2", capacity=GRAPH_SAMPLES,
+                                      history=self.history, channel='p2')
         l_gr.addWidget(self.graph_curr, 0, 0); l_gr.addWidget(self.graph_lvdt, 0, 1)
         l_gr.addWidget(self.graph_p1, 1, 0); l_gr.addWidget(self.graph_p2, 1, 1)
         g_gr.setLayout(l_gr); right.addWidget(g_gr)
+        if self.history_path:
+            for g in (self.graph_curr, self.graph_lvdt, self.graph_p1, self.graph_p2): g.show_history()
 
         g_tlm = QGroupBox("TELEMETRY"); l_tlm = QGridLayout()
         num_style = "font-size: 16pt; font-weight: 900; color: #000000; background: #FFFFFF; border: 2px solid black; padding: 2px;"
@@ -459,7 +687,9 @@ class MainWindow(QMainWindow):
         l_tlm.addWidget(QLabel("MAGAZINE:"), 0, 2); l_tlm.addWidget(self.lbl_mag_rem, 0, 3)
         l_tlm.addWidget(QLabel("BURST CNT:"), 1, 0); l_tlm.addWidget(self.lbl_burst_fired, 1, 1)
         l_tlm.addWidget(QLabel("MISS CNT:"), 1, 2); l_tlm.addWidget(self.lbl_miss, 1, 3)
+        self.lbl_ui_skip = QLabel("0"); self.lbl_ui_skip.setStyleSheet(num_style)
         l_tlm.addWidget(QLabel("CYCLE T:"), 2, 0); l_tlm.addWidget(self.lbl_time_sum, 2, 1)
+        l_tlm.addWidget(QLabel("UI SKIP:"), 2, 2); l_tlm.addWidget(self.lbl_ui_skip, 2, 3)
         g_tlm.setLayout(l_tlm); right.addWidget(g_tlm)
 
         g_sen = QGroupBox("FLAGS"); l_sen = QHBoxLayout()
@@ -482,18 +712,41 @@ class MainWindow(QMainWindow):
         g_act.setLayout(l_act); right.addWidget(g_act)
 
     def refresh_ports(self):
+        self.ports.refresh()
+
+    def on_ports(self, ports, added, removed):
+        # watcher thread: wake a reconnect straight away when our device comes back
+        if self.thread.port_name in added: self.thread.port_appeared()
+        self.ports_signal.emit(ports)
+
+    def update_ports(self, ports):
+        current = self.cb_port.currentText()
+        self.cb_port.blockSignals(True)
         self.cb_port.clear()
-        for p in serial.tools.list_ports.comports(): self.cb_port.addItem(p.device)
+        for dev, desc in ports.items():
+            self.cb_port.addItem(dev)
+            self.cb_port.setItemData(self.cb_port.count() - 1, desc, Qt.ToolTipRole)
+        if current and current not in ports and self.thread.running: self.cb_port.addItem(current)
+        if current: self.cb_port.setCurrentText(current)
+        self.cb_port.blockSignals(False)
     def toggle_con(self):
-        if self.b_con.isChecked(): self.thread.start_comms(self.cb_port.currentText())
+        if self.b_con.isChecked():
+            port = self.cb_port.currentText().strip()
+            if not port:
+                self.b_con.setChecked(False)
+                return
+            rec = default_recording_path() if self.ck_rec.isChecked() and not port.startswith('replay:') else None
+            self.thread.start_comms(port, rec)
         else: self.thread.stop_comms()
     def on_conn(self, ok):
         if ok: 
             self.b_con.setText("DISCONNECT")
         else: 
             self.b_con.setChecked(False); self.b_con.setText("CONNECT"); 
-            self.lb_st.setText("OFFLINE")
-            self.lb_st.setStyleSheet("background: #F0F0F0; color: #000000; font-size: 24pt; font-weight: 900; border: 3px solid #000000;")
+            err = self.thread.open_error
+            self.view.text(self.lb_st, "OPEN FAILED" if err else "OFFLINE")
+            self.lb_st.setToolTip(str(err) if err else "")
+            self.view.style(self.lb_st, ST_OFFLINE_STYLE)
     
     def set_cmd(self, k, v):
         if k == 'load': self.thread.cmd_load = v
@@ -511,72 +764,207 @@ class MainWindow(QMainWindow):
         self.thread.mode = self.bg_mode.checkedId()
         self.thread.burst = self.sb_burst.value()
         self.thread.timings = [sb.value() for sb in self.sb_times]
-
-    def update_ui(self, d):
-        if d.get('timeout', False):
-            self.lb_st.setText("NO LINK"); 
-            self.lb_st.setStyleSheet("background: #000000; color: #FF3D00; font-weight: 900; font-size: 24pt; border: 3px solid #FF3D00;")
-            self.ind_ack.setStyleSheet("background: #F0F0F0; border: 3px solid #000000;")
+        self.view.text(self.lbl_ui_skip, f"{self.view.skipped}")
+        if self.events_dirty:
+            self.events_dirty = False
+            self.view.text(self.lbl_events, "\n".join(format_event(ev, self.events_t0, STATE_TEXT) for ev in self.recent_events))
+            self.view.text(self.lbl_ev_count, f"CYCLES {self.n_cycles}  ERR {self.n_errors}  MISFIRE {self.n_misfires}")
+
+    def on_events(self, events):
+        if self.events_t0 is None: self.events_t0 = events[0].t
+        for ev in events:
+            k = ev.kind
+            if k == EV_SUCCESS: self.n_cycles += ev.new
+            elif k == EV_ERROR_ENTER: self.n_errors += 1
+            elif k == EV_MISFIRE: self.n_misfires += ev.new
+            if k in (EV_ERROR_ENTER, EV_ERROR_EXIT, EV_LINK) or (k == EV_MISFIRE and ev.new):
+                self.recent_events.append(ev)
+        self.events_dirty = True
+
+    def on_snapshot(self, path):
+        self.b_scope.setText(f"SCOPE ({self.scope.saved})")
+        if self.scope_win and self.scope_win.isVisible(): self.scope_win.refresh()
+
+    def open_scope(self):
+        if self.scope_win is None: self.scope_win = ScopeWindow(self.scope.directory)
+        else: self.scope_win.refresh()
+        self.scope_win.show(); self.scope_win.raise_()
+
+    def on_link(self, up):
+        self.update_link()
+        if up: return
+        self.view.text(self.lb_st, "NO LINK")
+        self.view.style(self.lb_st, ST_NOLINK_STYLE)
+        self.view.style(self.ind_ack, ACK_OFF_STYLE)
+
+    def update_link(self):
+        snap = self.thread.link.snapshot()
+        if not snap['up']:
+            self.view.text(self.ind_link, "LINK\nDOWN" if self.thread.running else "LINK\n--")
+            self.view.style(self.ind_link, ACK_OFF_STYLE)
             return
+        h = snap['health']
+        self.view.text(self.ind_link, f"LINK {h:.0f}%\n{snap['rate']:.0f}/s")
+        self.view.style(self.ind_link, LINK_STYLES[C_OK if h >= 90 else C_FIRE if h >= 50 else C_ERR])
+        self.ind_link.setToolTip(f"jitter {snap['jitter_ms']:.2f} ms, loss {snap['loss'] * 100:.2f}%, "
+                                 f"crc {snap['crc_rate']:.1f}/s, gaps {snap['gaps']}, drops {snap['downs']}")
+
+    def update_hud(self):
+        self.update_link()
+        if not (self.g_hud.isVisible() or self.stats_file): return
+        snap = STATS.snapshot()
+        if self.g_hud.isVisible(): self.view.text(self.lbl_hud, format_snapshot(snap))
+        if self.stats_file: STATS.export(self.stats_file, snap)
+
+    def export_stats(self):
+        path = f"perf_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, 'w') as f: json.dump(STATS.snapshot(), f, indent=1)
+
+    def update_ui(self, batch):
+        if not batch: return
+        now = time.monotonic()
+        t_rx = batch.times[-1]
+        self.h_signal.observe(now - t_rx)
+        self.write_log(batch)
+        if self.history is not None: self.history.append(batch)
+
+        self.graph_curr.add_values(batch['curr'], t_rx)
+        self.graph_p1.add_values(batch['p1'], t_rx)
+        self.graph_p2.add_values(batch['p2'], t_rx)
+        if not self.ck_bypass.isChecked(): self.graph_lvdt.add_values(batch['pos'], t_rx)
+        else: self.graph_lvdt.add_values([0] * len(batch), t_rx)
+
+        if now - self.last_draw_time < 0.030:
+            self.c_dropped_draws.inc()
+            return 
+        self.last_draw_time = now
 
-        self.write_log(d)
+        d = batch.last()
+
+        st = d.state
+        txt, st_style = STATE_VIEW[st]
+        v = self.view
+        v.text(self.lb_st, txt)
+        v.style(self.lb_st, st_style)
+        v.style(self.ind_ack, ACK_ON_STYLE if d.ack_flags > 0 else ACK_OFF_STYLE)
+
+        v.text(self.lbl_curr, f"{d.curr:.2f} A")
+        v.text(self.lbl_mag_rem, f"{d.mag_rem}")
+        v.text(self.lbl_burst_fired, f"{d.burst_fired}")
+        v.text(self.lbl_miss, f"{d.count_miss}")
+        v.text(self.lbl_time_sum, f"{d.timing_sum} ms")
+
+        v.led(self.ind_p1, d.p1 > 0)
+        v.led(self.ind_p2, d.p2 > 0)
+        v.led(self.ind_jam, d.misfire or st==12, C_ERR)
+        v.led(self.ind_out, d.out or st==13, C_ERR)
+        v.led(self.ind_suc, d.success, C_OK)
+        v.led(self.ind_mis, d.misfire, C_ERR)
+        self.h_update.observe(time.monotonic() - now)
 
-        now = time.time()
-        if now - self.last_draw_time < 0.030: return 
-        self.last_draw_time = now
+    def closeEvent(self, event):
+        self.thread.stop_comms()
+        if hasattr(self, 'ports'): self.ports.stop()
+        if hasattr(self, 'logger'): self.logger.close()
+        if getattr(self, 'history', None) is not None: self.history.close()
+        if hasattr(self, 'event_log'): self.event_log.close()
+        if hasattr(self, 'scope'): self.scope.close()
+        if self.scope_win: self.scope_win.close()
+        event.accept()
 
-        self.graph_curr.add_value(d['curr'])
-        self.graph_p1.add_value(d['p1'])
-        self.graph_p2.add_value(d['p2'])
-        if not self.ck_bypass.isChecked(): self.graph_lvdt.add_value(d['pos'])
-        else: self.graph_lvdt.add_value(0)
+OV_STATE_VIEW = tuple((txt, style.replace("24pt", "11pt")) for txt, style in STATE_VIEW)
+OV_NOLINK_STYLE = ST_NOLINK_STYLE.replace("24pt", "11pt")
+OV_GRAPH_SAMPLES = 2048
 
-        st = d['state']
-        txt = {0:"UNK", 1:"READY LOAD", 2:"READY FIRE", 3:"LOAD(EXT)", 4:"WAIT", 5:"LOAD(RET)", 6:"FIRING", 7:"MAN EXT", 8:"MAN RET", 10: "ERR: OVC", 11: "ERR: LVDT", 12:"JAMMED", 13:"EMPTY"}.get(st, f"STATE {st}")
-        
-        col = "#F0F0F0"
-        if st in [1, 2]: col = "#76FF03" 
-        elif st == 6: col = "#FFEB3B" 
-        elif st >= 10: col = "#FF3D00" 
-        elif st in [3,4,5]: col = "#00E5FF" 
-        
-        self.lb_st.setText(txt)
-        self.lb_st.setStyleSheet(f"background: {col}; color: black; font-weight: 900; font-size: 24pt; border: 3px solid black;")
-        
-        ack = d['ack_flags']
-        if ack > 0:
-            self.ind_ack.setStyleSheet("background: #76FF03; color: black; font-weight: bold; border: 3px solid black;")
-        else:
-            self.ind_ack.setStyleSheet("background: #F0F0F0; border: 3px solid #000000;")
+class DeviceOverview(QMainWindow):
+    def __init__(self, ports, log_dir="."):
+        super().__init__()
+        from gcu_session import Session
+        self.setWindowTitle(f"GCU OVERVIEW // {len(ports)} DEVICES")
+        self.resize(1280, 120 + 110 * len(ports))
+        self.setStyleSheet("QMainWindow { background: #F0F0F0; } QLabel { font-family: 'Consolas', monospace; font-weight: bold; }")
+        self.session = Session(ports, log_dir=log_dir)
+        self.batches = queue.SimpleQueue()
+        self.view = ViewCache()
+        self.rows = []
+        self.graphs = {}
+        w = QWidget(); self.setCentralWidget(w); grid = QGridLayout(w)
+        grid.setContentsMargins(15, 15, 15, 15)
+        grid.setColumnStretch(4, 1)
+        for i, dev in enumerate(self.session.devices):
+            dev.on_batch = lambda dev, batch: self.batches.put((dev, batch))
+            name = QLabel(f"{dev.name}\n{dev.port_name}")
+            st = QLabel("OFFLINE"); st.setAlignment(Qt.AlignCenter); st.setFixedWidth(140); st.setStyleSheet(ACK_OFF_STYLE)
+            link = QLabel("LINK\n--"); link.setAlignment(Qt.AlignCenter); link.setFixedWidth(100); link.setStyleSheet(ACK_OFF_STYLE)
+            info = QLabel(""); info.setFixedWidth(220)
+            graph = RealTimeGraph(20.0, QColor("#FF4081"), "CURR", OV_GRAPH_SAMPLES, stats_prefix=None)
+            graph.setMinimumHeight(90)
+            for col, widget in enumerate((name, st, link, info, graph)): grid.addWidget(widget, i, col)
+            self.rows.append((dev, st, link, info))
+            self.graphs[dev.name] = graph
 
-        self.lbl_curr.setText(f"{d['curr']:.2f} A")
-        self.lbl_mag_rem.setText(f"{d['mag_rem']}")
-        self.lbl_burst_fired.setText(f"{d['burst_fired']}")
-        self.lbl_miss.setText(f"{d['count_miss']}")
-        self.lbl_time_sum.setText(f"{d['timing_sum']} ms")
-        
-        def set_led(l, on, c="#76FF03"):
-            bg = c if on else "#FFFFFF"
-            fg = "black" if on else "#F0F0F0"
-            l.setStyleSheet(f"background: {bg}; color: {fg}; font-weight: bold; border: 2px solid #000000; min-width: 50px; padding: 5px;")
-        
-        set_led(self.ind_p1, d['p1'] > 0)
-        set_led(self.ind_p2, d['p2'] > 0)
-        set_led(self.ind_jam, d['misfire'] or st==12, "#FF3D00")
-        set_led(self.ind_out, d['out'] or st==13, "#FF3D00")
-        set_led(self.ind_suc, d['success'], "#76FF03")
-        set_led(self.ind_mis, d['misfire'], "#FF3D00")
+        self.tmr = QTimer()
+        self.tmr.timeout.connect(self.drain)
+        self.tmr.start(50)
+        self.ui_tmr = QTimer()
+        self.ui_tmr.timeout.connect(self.update_rows)
+        self.ui_tmr.start(250)
+        self.session.start()
+
+    def drain(self):
+        while True:
+            try: dev, batch = self.batches.get_nowait()
+            except queue.Empty: break
+            self.graphs[dev.name].add_values(batch['curr'], batch.times[-1])
+
+    def update_rows(self):
+        v = self.view
+        for dev, st, link, info in self.rows:
+            r = dev.summary()
+            if r['state'] is None or not r['connected']:
+                v.text(st, "OFFLINE" if not r['connected'] else "NO DATA"); v.style(st, ACK_OFF_STYLE)
+            elif not r['up']:
+                v.text(st, "NO LINK"); v.style(st, OV_NOLINK_STYLE)
+            else:
+                txt, style = OV_STATE_VIEW[r['state']]
+                v.text(st, txt); v.style(st, style)
+            if r['up']:
+                h = r['health']
+                v.text(link, f"LINK {h:.0f}%\n{r['rate']:.0f}/s")
+                v.style(link, LINK_STYLES[C_OK if h >= 90 else C_FIRE if h >= 50 else C_ERR])
+            else:
+                v.text(link, "LINK\nDOWN" if r['connected'] else "LINK\n--"); v.style(link, ACK_OFF_STYLE)
+            curr = "--" if r['curr'] is None else f"{r['curr']:.2f} A"
+            v.text(info, f"MAG {r['mag_rem'] if r['mag_rem'] is not None else '--'}  {curr}\n"
+                         f"CYC {r['cycles']}  ERR {r['errors']}  MIS {r['misfires']}")
 
     def closeEvent(self, event):
-        self.thread.stop_comms()
-        if hasattr(self, 'csv_file') and self.csv_file: self.csv_file.close()
+        self.session.stop()
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    ap = argparse.ArgumentParser(description="GCU monitor")
+    ap.add_argument('--io', choices=('event', 'poll', 'process'), default='event',
+                    help="comms loop: wait on the port fd/next TX deadline, poll every 100 us, "
+                         "or decode in a worker process through shared memory")
+    ap.add_argument('--hud', action='store_true', help="show the performance HUD")
+    ap.add_argument('--stats-file', default=None, help="append a JSON stats snapshot every second")
+    ap.add_argument('--port', default=None, help="port to preselect: serial device, pty:PATH, tcp:HOST:PORT, sim:k=v,... "
+                                                  "or replay:FILE[@SPEED]")
+    ap.add_argument('--history', default=None, metavar='DIR', help="browse a recorded .gcuh history store")
+    ap.add_argument('--record-history', action='store_true', help="record a .gcuh history store for zoomable plots")
+    ap.add_argument('--devices', nargs='+', default=None, metavar='PORT',
+                    help="monitor several ports in one overview window (sim:, tcp:, pty:, serial)")
+    ap.add_argument('--log-dir', default=".", help="log directory for --devices")
+    ap.add_argument('--trigger', action='append', default=None, metavar='SPEC',
+                    help="scope trigger 'label:field OP value', repeatable (default: misfire, state 10, state 11)")
+    args, qt_args = ap.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
     font = QFont("Consolas")
     font.setStyleHint(QFont.Monospace)
     app.setFont(font)
-    w = MainWindow()
+    if args.devices: w = DeviceOverview(args.devices, log_dir=args.log_dir)
+    else: w = MainWindow(io_mode=args.io, hud=args.hud, stats_file=args.stats_file, history=args.history,
+                         triggers=args.trigger, record_history=args.record_history, port=args.port)
     w.show()
     sys.exit(app.exec_())
\ No newline at end of file
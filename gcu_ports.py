@@ -0,0 +1,105 @@
+import os
+import glob
+import time
+import threading
+from gcu_replay import REC_EXT
+
+RECONNECT_MIN = 0.05
+RECONNECT_MAX = 1.0
+WATCH_INTERVAL = 0.25       # how often the cheap /dev signature is checked
+FULL_SCAN_INTERVAL = 5.0    # full enumeration even when the signature has not changed
+
+class Backoff:
+    def __init__(self, lo=RECONNECT_MIN, hi=RECONNECT_MAX):
+        self.lo = lo
+        self.hi = hi
+        self.delay = lo
+        self.next_at = 0.0
+        self.attempts = 0
+
+    def reset(self, now=0.0):
+        self.delay = self.lo
+        self.next_at = now
+        self.attempts = 0
+
+    def due(self, now):
+        return now >= self.next_at
+
+    def failed(self, now):
+        self.attempts += 1
+        self.next_at = now + self.delay
+        self.delay = min(self.delay * 2, self.hi)
+
+def list_ports(replay_dir="."):
+    import serial.tools.list_ports
+    ports = {p.device: p.description for p in serial.tools.list_ports.comports()}
+    for f in sorted(glob.glob(os.path.join(replay_dir, f"*{REC_EXT}"))):
+        ports[f"replay:{os.path.relpath(f) if replay_dir == '.' else f}"] = "raw recording"
+    return ports
+
+def dev_signature(replay_dir="."):
+    # Creating or removing a device node or recording bumps the directory mtime, which is far cheaper
+    # to poll than a full comports() scan. None where /dev does not exist, so only timed scans run.
+    try: return os.stat('/dev').st_mtime_ns, os.stat(replay_dir).st_mtime_ns
+    except OSError: return None
+
+# Enumerates ports on its own thread and keeps the last result, so the UI never waits on comports().
+# Subscribers get (ports, added, removed) on the watcher thread whenever the set of ports changes.
+class PortWatcher:
+    def __init__(self, interval=WATCH_INTERVAL, full_interval=FULL_SCAN_INTERVAL, replay_dir="."):
+        self.interval = interval
+        self.full_interval = full_interval
+        self.replay_dir = replay_dir
+        self.ports = {}
+        self.scans = 0
+        self.scan_s = 0.0
+        self.errors = 0
+        self.subscribers = []
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def subscribe(self, fn):
+        self.subscribers.append(fn)
+
+    def start(self):
+        if self.thread and self.thread.is_alive(): return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="gcu-ports", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread: self.thread.join(2.0)
+        self.thread = None
+
+    def refresh(self):
+        self.wake.set()
+
+    def scan(self):
+        t0 = time.monotonic()
+        try: ports = list_ports(self.replay_dir)
+        except Exception:
+            self.errors += 1
+            return
+        self.scans += 1
+        self.scan_s = time.monotonic() - t0
+        added = [p for p in ports if p not in self.ports]
+        removed = [p for p in self.ports if p not in ports]
+        self.ports = ports
+        if added or removed or self.scans == 1:
+            for fn in self.subscribers: fn(dict(ports), added, removed)
+
+    def run(self):
+        sig, last_scan = None, 0.0
+        while self.running:
+            now = time.monotonic()
+            forced = self.wake.is_set()
+            self.wake.clear()
+            new_sig = dev_signature(self.replay_dir)
+            stale = now - last_scan >= (self.full_interval if new_sig is not None else self.interval * 4)
+            if forced or stale or new_sig != sig:
+                sig, last_scan = new_sig, now
+                self.scan()
+            self.wake.wait(self.interval)
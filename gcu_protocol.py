@@ -0,0 +1,235 @@
+import re
+import struct
+from array import array
+from operator import itemgetter
+from collections import namedtuple
+from gcu_crc import crc16, crc16_rows
+
+CMD_HEADER = 0xA5
+TLM_HEADER = 0x55
+BAUD_RATE = 460800
+CMD_FMT = '<BBHBIIIIBBBBBHBBB'
+PACKET_SIZE = 68
+TX_INTERVAL = 0.005
+LINK_TIMEOUT = 1.0
+
+Field = namedtuple('Field', ('name', 'code', 'scale', 'unit'), defaults=(1.0, ''))
+
+# The telemetry frame, in wire order: name, struct code, scale to engineering units, unit.
+# Everything else (struct, record type, array typecodes, NumPy dtypes) is generated from this table.
+TLM_SCHEMA = (
+    Field('header', 'B'), Field('state', 'B'), Field('err', 'B'), Field('mag_rem', 'H'), Field('burst_fired', 'H'),
+    Field('curr', 'f', 1.0, 'A'),
+    Field('cur_t1', 'I'), Field('cur_t2', 'I'), Field('cur_t3', 'I'), Field('cur_t4', 'I'),
+    Field('lvdt_header', 'B'), Field('mode_flags', 'B'), Field('b_cnt_lvdt', 'B'), Field('b_rem_lvdt', 'B'),
+    Field('t_recv', 'I'), Field('t_free', 'I'), Field('t_chamb', 'I'), Field('t_shock', 'I'),
+    Field('p1', 'B'), Field('p2', 'B'), Field('success', 'B'), Field('misfire', 'B'), Field('out', 'B'),
+    Field('pos', 'H'), Field('lvdt_crc', 'H'), Field('count_miss', 'I'), Field('timing_sum', 'I', 1.0, 'ms'),
+    Field('ack_flags', 'H'),
+)
+
+def parse_format(fmt):
+    return re.findall(r'\d*[a-zA-Z?]', fmt.lstrip('<>=!@'))
+
+class Codec:
+    def __init__(self, fields, name='TelemetryRecord'):
+        self.fields = tuple(Field(*f) for f in fields)
+        self.names = tuple(f.name for f in self.fields)
+        self.codes = tuple(f.code for f in self.fields)
+        self.fmt = '<' + ''.join(self.codes)
+        self.struct = struct.Struct(self.fmt)
+        self.size = self.struct.size
+        self.index = {n: i for i, n in enumerate(self.names)}
+        self.typecodes = tuple({'f': 'f', 'I': 'L' if array('I').itemsize < 4 else 'I'}.get(c, c) for c in self.codes)
+        self.record = namedtuple(name, self.names)
+        self._dtypes = {}
+
+    @classmethod
+    def from_format(cls, fmt, names):
+        codes = parse_format(fmt)
+        if len(codes) != len(names): raise ValueError(f"{fmt} has {len(codes)} fields, expected {len(names)}")
+        return cls(zip(names, codes))
+
+    def unpack(self, data):
+        return self.record._make(self.struct.unpack(data))
+
+    def getter(self, name):
+        return itemgetter(self.index[name])
+
+    def value(self, row, name):
+        i = self.index[name]
+        scale = self.fields[i].scale
+        return row[i] * scale if scale != 1.0 else row[i]
+
+    def dtype(self, head=(), tail=()):
+        # packed little-endian structured dtype; head/tail add (name, code) fields around the payload
+        key = (tuple(head), tuple(tail))
+        dt = self._dtypes.get(key)
+        if dt is None:
+            import numpy as np
+            dt = np.dtype([(n, '<' + c) for n, c in (*key[0], *zip(self.names, self.codes), *key[1])])
+            self._dtypes[key] = dt
+        return dt
+
+    def frombuffer(self, data, head=(), tail=(), count=-1, offset=0):
+        import numpy as np
+        return np.frombuffer(data, self.dtype(head, tail), count, offset)
+
+    def column(self, rec, name):
+        scale = self.fields[self.index[name]].scale
+        return rec[name] * scale if scale != 1.0 else rec[name]
+
+TLM_CODEC = Codec(TLM_SCHEMA)
+TLM_STRUCT = TLM_CODEC.struct
+FULL_TLM_FMT = TLM_CODEC.fmt
+CMD_STRUCT = struct.Struct(CMD_FMT)
+CRC_STRUCT = struct.Struct('<H')
+PAYLOAD_SIZE = TLM_CODEC.size
+REC_HEAD = (('t_mono', 'd'),)
+REC_FMT = '<d' + FULL_TLM_FMT[1:]
+REC_STRUCT = struct.Struct(REC_FMT)
+FRAME_TAIL = (('crc', 'H'),)
+if PAYLOAD_SIZE + CRC_STRUCT.size != PACKET_SIZE:
+    raise ValueError(f"telemetry schema is {PAYLOAD_SIZE} + {CRC_STRUCT.size} bytes, PACKET_SIZE is {PACKET_SIZE}")
+
+TLM_FIELDS = TLM_CODEC.names
+TLM_CODES = TLM_CODEC.codes
+TLM_TYPECODES = TLM_CODEC.typecodes
+TLM_INDEX = TLM_CODEC.index
+
+TelemetryRecord = TLM_CODEC.record
+
+class TelemetryBatch:
+    __slots__ = ('rows', 'times', '_cols')
+
+    def __init__(self, rows=None, times=None):
+        self.rows = rows if rows is not None else []
+        self.times = times if times is not None else array('d')
+        self._cols = {}
+
+    @classmethod
+    def from_records(cls, rec):
+        # contiguous REC_HEAD records (a private copy, never the live ring): rows unpacked straight from
+        # its buffer, which beats a multi-field tolist, and t_mono in one copy
+        import numpy as np
+        rows = [v[1:] for v in REC_STRUCT.iter_unpack(memoryview(rec.view(np.uint8)))]
+        return cls(rows, array('d', rec['t_mono'].astype('=f8').tobytes()))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def append(self, val, t):
+        self.rows.append(val); self.times.append(t); self._cols.clear()
+
+    def extend(self, vals, t):
+        if not vals: return
+        self.rows.extend(vals); self.times.extend([t] * len(vals)); self._cols.clear()
+
+    def __getitem__(self, key):
+        if isinstance(key, str): return self.column(key)
+        return TelemetryRecord._make(self.rows[key])
+
+    def __iter__(self):
+        return map(TelemetryRecord._make, self.rows)
+
+    def column(self, name):
+        col = self._cols.get(name)
+        if col is None:
+            i = TLM_INDEX[name]
+            col = self._cols[name] = array(TLM_TYPECODES[i], [r[i] for r in self.rows])
+        return col
+
+    def columns(self):
+        if self.rows and len(self._cols) < len(TLM_FIELDS):
+            for name, tc, col in zip(TLM_FIELDS, TLM_TYPECODES, zip(*self.rows)):
+                if name not in self._cols: self._cols[name] = array(tc, col)
+        return {name: self.column(name) for name in TLM_FIELDS}
+
+    def last(self):
+        return TelemetryRecord._make(self.rows[-1]) if self.rows else None
+
+def encode_command(seq, mode, timings, safety, load, fire, manual, burst, ammo, enable, bypass, reset):
+    pkt = CMD_STRUCT.pack(CMD_HEADER, 1, seq, mode, timings[0], timings[1], timings[2], timings[3],
+                          safety, load, fire, manual, burst, ammo, enable, bypass, reset)
+    return pkt + CRC_STRUCT.pack(crc16(pkt))
+
+def encode_frame(values):
+    payload = TLM_STRUCT.pack(*values)
+    return payload + CRC_STRUCT.pack(crc16(payload))
+
+def decode_frames(data):
+    # Bulk path for frame-aligned buffers: one structured view and a column-wise CRC, no per-frame Python.
+    import numpy as np
+    n = len(data) // PACKET_SIZE
+    rec = TLM_CODEC.frombuffer(data, tail=FRAME_TAIL, count=n)
+    raw = np.frombuffer(data, np.uint8, n * PACKET_SIZE).reshape(n, PACKET_SIZE)
+    ok = (rec['header'] == TLM_HEADER) & (crc16_rows(raw[:, :PAYLOAD_SIZE]) == rec['crc'])
+    return rec if ok.all() else rec[ok]
+
+class FrameDecoder:
+    def __init__(self, capacity=65536):
+        self.buf = bytearray(capacity)
+        self.rd = 0
+        self.wr = 0
+        self.bytes_in = 0
+        self.frames = 0
+        self.discarded = 0
+        self.crc_errors = 0
+        self.compactions = 0
+
+    @property
+    def pending(self):
+        return self.wr - self.rd
+
+    def reset(self):
+        self.rd = self.wr = 0
+
+    def feed(self, data):
+        n = len(data)
+        if not n: return
+        if self.wr + n > len(self.buf): self._compact(n)
+        self.buf[self.wr:self.wr + n] = data
+        self.wr += n
+        self.bytes_in += n
+
+    def _compact(self, need):
+        live = self.wr - self.rd
+        if live + need > len(self.buf):
+            grown = bytearray(max(len(self.buf) * 2, live + need))
+            grown[:live] = self.buf[self.rd:self.wr]
+            self.buf = grown
+        elif live:
+            self.buf[:live] = self.buf[self.rd:self.wr]
+        self.rd, self.wr = 0, live
+        self.compactions += 1
+
+    def decode(self, limit=None):
+        out = []
+        buf, rd, wr = self.buf, self.rd, self.wr
+        unpack, crc_unpack = TLM_STRUCT.unpack_from, CRC_STRUCT.unpack_from
+        with memoryview(buf) as mv:
+            while wr - rd >= PACKET_SIZE:
+                if buf[rd] != TLM_HEADER:
+                    idx = buf.find(TLM_HEADER, rd, wr)
+                    if idx < 0:
+                        self.discarded += wr - rd; rd = wr; break
+                    self.discarded += idx - rd; rd = idx
+                    continue
+                end = rd + PAYLOAD_SIZE
+                if crc16(mv[rd:end]) == crc_unpack(mv, end)[0]:
+                    out.append(unpack(mv, rd))
+                    rd += PACKET_SIZE
+                    if limit and len(out) >= limit: break
+                else:
+                    self.crc_errors += 1; self.discarded += 1; rd += 1
+        self.frames += len(out)
+        if rd == wr: rd = wr = 0
+        self.rd, self.wr = rd, wr
+        return out
+
+    def stats(self):
+        return {'bytes_in': self.bytes_in, 'frames': self.frames, 'discarded': self.discarded,
+                'crc_errors': self.crc_errors, 'pending': self.pending, 'compactions': self.compactions}
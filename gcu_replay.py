@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import struct
+from datetime import datetime
+
+REC_MAGIC = b'GCUR'
+REC_VERSION = 1
+REC_EXT = '.gcur'
+REC_HDR = struct.Struct('<4sHI')
+CHUNK_HDR = struct.Struct('<QI')
+
+class SessionRecorder:
+    def __init__(self, path, meta=None):
+        self.path = path
+        self.meta = dict(meta or {})
+        self.file = None
+        self.t0 = 0
+        self.chunks = 0
+        self.bytes = 0
+        self.errors = 0
+        self.failed = False
+
+    def _open(self):
+        self.t0 = time.perf_counter_ns()
+        self.meta.setdefault('wall_t0', time.time())
+        meta = json.dumps(self.meta).encode()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.file = open(self.path, 'wb')
+        self.file.write(REC_HDR.pack(REC_MAGIC, REC_VERSION, len(meta)) + meta)
+
+    def record(self, data, t_ns=None):
+        if not data or self.failed: return
+        try:
+            if self.file is None: self._open()
+            t = (t_ns if t_ns is not None else time.perf_counter_ns()) - self.t0
+            self.file.write(CHUNK_HDR.pack(max(t, 0), len(data)))
+            self.file.write(data)
+        except OSError:
+            # called from RecordingPort.read: a disk error must not look like the port going away
+            self.errors += 1
+            self.failed = True
+            self.close()
+            return
+        self.chunks += 1
+        self.bytes += len(data)
+
+    def close(self):
+        if self.file:
+            try: self.file.close()
+            except OSError: pass
+            self.file = None
+
+class RecordingPort:
+    def __init__(self, port, recorder):
+        self.port = port
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.port, name)
+
+    def read(self, size=1):
+        data = self.port.read(size)
+        self.recorder.record(data)
+        return data
+
+    def close(self):
+        try: self.port.close()
+        finally: self.recorder.close()
+
+def read_recording_header(f):
+    magic, version, meta_len = REC_HDR.unpack(f.read(REC_HDR.size))
+    if magic != REC_MAGIC: raise ValueError("not a GCU raw recording")
+    if version > REC_VERSION: raise ValueError(f"unsupported recording version {version}")
+    return json.loads(f.read(meta_len))
+
+def iter_recording(path):
+    with open(path, 'rb') as f:
+        read_recording_header(f)
+        while True:
+            hdr = f.read(CHUNK_HDR.size)
+            if len(hdr) < CHUNK_HDR.size: return
+            t, n = CHUNK_HDR.unpack(hdr)
+            data = f.read(n)
+            if len(data) < n: return
+            yield t, data
+
+class ReplayPort:
+    def __init__(self, path, speed=1.0, loop=False, burst=65536):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.burst = burst
+        with open(path, 'rb') as f: self.meta = read_recording_header(f)
+        self.buf = bytearray()
+        self.is_open = True
+        self.eof = False
+        self.tx_bytes = 0
+        self.loops = 0
+        self._rewind()
+
+    def _rewind(self):
+        self.chunks = iter_recording(self.path)
+        self.next_chunk = next(self.chunks, None)
+        self.start_ns = time.perf_counter_ns()
+        self.t_base = self.next_chunk[0] if self.next_chunk else 0
+
+    def _pump(self):
+        if not self.speed:
+            while self.next_chunk and len(self.buf) < self.burst:
+                self.buf += self.next_chunk[1]
+                self.next_chunk = next(self.chunks, None)
+        else:
+            due = (time.perf_counter_ns() - self.start_ns) * self.speed + self.t_base
+            while self.next_chunk and self.next_chunk[0] <= due:
+                self.buf += self.next_chunk[1]
+                self.next_chunk = next(self.chunks, None)
+        if self.next_chunk is None:
+            if self.loop: self.loops += 1; self._rewind()
+            else: self.eof = True
+
+    def next_due(self):
+        if not self.next_chunk: return None
+        if not self.speed: return 0.0
+        due_ns = self.start_ns + (self.next_chunk[0] - self.t_base) / self.speed
+        return max(0.0, (due_ns - time.perf_counter_ns()) / 1e9)
+
+    @property
+    def in_waiting(self):
+        if not self.buf: self._pump()
+        return len(self.buf)
+
+    def read(self, size=1):
+        if len(self.buf) < size: self._pump()
+        data = bytes(self.buf[:size])
+        del self.buf[:size]
+        return data
+
+    def write(self, data):
+        self.tx_bytes += len(data)
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+
+def parse_replay_spec(spec):
+    # "replay:<path>[@<speed>]", speed 0 = as fast as possible
+    body = spec[len('replay:'):]
+    path, sep, speed = body.rpartition('@')
+    if not sep: return body, 1.0
+    try: return path, float(speed)
+    except ValueError: return body, 1.0
+
+def default_recording_path(directory="."):
+    return os.path.join(directory, f"raw_{datetime.now().strftime('%Y%m%d_%H%M%S')}{REC_EXT}")
+
+if __name__ == "__main__":
+    import argparse
+    from gcu_protocol import FrameDecoder
+    ap = argparse.ArgumentParser(description="Inspect or benchmark a raw GCU serial recording")
+    ap.add_argument('recording')
+    ap.add_argument('--speed', type=float, default=0.0, help="replay speed, 0 = as fast as possible")
+    args = ap.parse_args()
+    port, dec, frames = ReplayPort(args.recording, speed=args.speed), FrameDecoder(), 0
+    t0 = time.perf_counter()
+    while not (port.eof and not port.in_waiting):
+        n = port.in_waiting
+        if n: dec.feed(port.read(n)); frames += len(dec.decode())
+        elif port.speed: time.sleep(min(port.next_due() or 0.001, 0.01))
+    dt = time.perf_counter() - t0
+    print(json.dumps(dict(port.meta, seconds=round(dt, 3), frames_per_s=round(frames / dt) if dt else None,
+                          **dec.stats()), indent=1))
@@ -0,0 +1,221 @@
+import os
+import re
+import time
+import queue
+import operator
+import threading
+from collections import deque
+from array import array
+from datetime import datetime
+from operator import itemgetter
+from gcu_protocol import TLM_INDEX, REC_STRUCT
+
+SNAP_PREFIX = 'snap_'
+DEFAULT_TRIGGERS = ('misfire:misfire!=0', 'ovc:state==10', 'lvdt:state==11')
+DEFAULT_PRE = 500           # frames kept before the trigger
+DEFAULT_POST = 1000         # frames captured after it
+CHANNELS = ('curr', 'pos', 'p1', 'p2')
+
+OPS = {'==': operator.eq, '!=': operator.ne, '>=': operator.ge, '<=': operator.le, '>': operator.gt, '<': operator.lt}
+# C-speed test for "could any frame in this column match", so quiet batches never reach the per-frame scan
+MAYBE = {'==': lambda col, v: v in col, '!=': lambda col, v: col.count(v) != len(col),
+         '>=': lambda col, v: max(col) >= v, '<=': lambda col, v: min(col) <= v,
+         '>': lambda col, v: max(col) > v, '<': lambda col, v: min(col) < v}
+
+class Trigger:
+    __slots__ = ('name', 'field', 'index', 'op', 'value', 'test', 'maybe', 'prev')
+
+    def __init__(self, spec):
+        name, _, expr = spec.rpartition(':')
+        m = re.fullmatch(r'\s*(\w+)\s*(==|!=|>=|<=|>|<)\s*(-?[\d.]+)\s*', expr)
+        if m: field, op, value = m.group(1), m.group(2), float(m.group(3))
+        else: field, op, value = expr.strip(), '!=', 0.0
+        if field not in TLM_INDEX: raise ValueError(f"unknown telemetry field in trigger {spec!r}")
+        self.name = name or re.sub(r'\W+', '_', expr).strip('_')
+        self.field = field
+        self.index = TLM_INDEX[field]
+        self.op = op
+        self.value = int(value) if value.is_integer() else value
+        self.test = OPS[op]
+        self.maybe = MAYBE[op]
+        self.prev = False
+
+    def __repr__(self):
+        return f"{self.name}:{self.field}{self.op}{self.value}"
+
+# Oscilloscope-style capture on the decode side: every frame goes into a preallocated ring, a rising
+# trigger condition freezes pre/post frames around it, and a writer thread saves the window as a small
+# .gcul log. Memory is the ring plus a bounded save queue, however long the run.
+class Scope:
+    def __init__(self, triggers=DEFAULT_TRIGGERS, pre=DEFAULT_PRE, post=DEFAULT_POST, directory=".", prefix=SNAP_PREFIX,
+                 holdoff=0.5, queue_size=8):
+        self.triggers = [t if isinstance(t, Trigger) else Trigger(t) for t in triggers]
+        self.pre = pre
+        self.post = post
+        self.capacity = 2 * (pre + post)
+        self.rows = [None] * self.capacity
+        self.times = array('d', bytes(8 * self.capacity))
+        self.head = 0
+        self.directory = directory
+        self.prefix = prefix
+        self.holdoff = holdoff
+        self.active = None
+        self.last_fire = float('-inf')
+        self.fired = 0
+        self.saved = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.paths = deque(maxlen=256)
+        self.subscribers = []
+        self.q = queue.Queue(maxsize=queue_size)
+        self.thread = None
+
+    def subscribe(self, fn):
+        self.subscribers.append(fn)
+
+    def feed(self, rows, t):
+        if rows: self._push(rows, array('d', [t]) * len(rows))
+
+    def feed_batch(self, batch):
+        if batch: self._push(batch.rows, batch.times)
+
+    def _push(self, rows, times):
+        n, cap, base = len(rows), self.capacity, self.head
+        if n > cap: rows, times = rows[-cap:], times[-cap:]
+        i = (base + n - len(rows)) % cap
+        k = min(len(rows), cap - i)
+        self.rows[i:i + k] = rows[:k]; self.times[i:i + k] = times[:k]
+        if k < len(rows):
+            self.rows[:len(rows) - k] = rows[k:]; self.times[:len(rows) - k] = times[k:]
+        self.head = base + n
+        for frame, trig in self.scan(rows, self.head - len(rows)):
+            self.fire(frame, trig)
+        if self.active and self.head >= self.active[0] + self.post: self.complete()
+
+    def scan(self, rows, base):
+        hits, cols = [], {}
+        for trig in self.triggers:
+            col = cols.get(trig.index)
+            if col is None: col = cols[trig.index] = list(map(itemgetter(trig.index), rows))
+            if not trig.maybe(col, trig.value):
+                trig.prev = False
+                continue
+            test, v, prev = trig.test, trig.value, trig.prev
+            for k, x in enumerate(col):
+                cur = test(x, v)
+                if cur and not prev: hits.append((base + k, trig))
+                prev = cur
+            trig.prev = prev
+        if len(hits) > 1: hits.sort(key=itemgetter(0))
+        return hits
+
+    def fire(self, frame, trig):
+        if self.active and frame >= self.active[0] + self.post: self.complete()
+        if self.active:
+            self.active[3].append((frame - self.active[0], trig.name))
+            return
+        t = self.times[frame % self.capacity]
+        if t - self.last_fire < self.holdoff:
+            self.suppressed += 1
+            return
+        self.last_fire = t
+        self.fired += 1
+        self.active = [frame, trig, t, []]
+
+    def complete(self):
+        frame, trig, t, marks = self.active
+        self.active = None
+        start = max(frame - self.pre, self.head - self.capacity, 0)
+        stop = min(frame + self.post, self.head)
+        rows, times = self.window(start, stop)
+        snap = {'trigger': trig.name, 'condition': repr(trig), 'trigger_frame': frame, 'trigger_index': frame - start,
+                'marks': [(frame - start + d, name) for d, name in marks], 'pre': self.pre, 'post': self.post}
+        wall = time.time() - (time.monotonic() - t)
+        try: self.q.put_nowait((snap, wall, t, rows, times))
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="gcu-scope", daemon=True)
+            self.thread.start()
+
+    def window(self, start, stop):
+        cap = self.capacity
+        i, j = start % cap, stop % cap
+        if stop - start <= 0: return [], array('d')
+        if i < j: return self.rows[i:j], self.times[i:j]
+        return self.rows[i:] + self.rows[:j], self.times[i:] + self.times[:j]
+
+    def flush(self):
+        if self.active: self.complete()
+
+    def run(self):
+        while True:
+            item = self.q.get()
+            if item is None: break
+            try: path = self.save(*item)
+            except OSError: self.dropped += 1; continue
+            self.paths.append(path)
+            self.saved += 1
+            for fn in self.subscribers: fn(path, item[0])
+
+    def save(self, snap, wall, t0, rows, times):
+        from gcu_logger import log_header, LOG_EXT
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(wall).strftime('%Y%m%d_%H%M%S')
+        stem = os.path.join(self.directory, f"{self.prefix}{stamp}_{snap['trigger']}")
+        path, n = stem + LOG_EXT, 1
+        while os.path.exists(path):
+            path = f"{stem}_{n:03d}{LOG_EXT}"; n += 1
+        pack = REC_STRUCT.pack
+        with open(path, 'wb') as f:
+            f.write(log_header(wall, t0, kind='snapshot', **snap))
+            f.write(b''.join([pack(t, *row) for row, t in zip(rows, times)]))
+        return path
+
+    def close(self, timeout=5.0):
+        self.flush()
+        if self.thread:
+            self.q.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+
+    def stats(self):
+        return {'fired': self.fired, 'saved': self.saved, 'suppressed': self.suppressed, 'dropped': self.dropped,
+                'capacity': self.capacity, 'frames': self.head}
+
+def load_snapshot(path):
+    from gcu_logger import load_log
+    meta, rec = load_log(path)
+    if meta.get('kind') != 'snapshot': raise ValueError("not a scope snapshot")
+    return meta, rec
+
+def list_snapshots(directory=".", prefix=SNAP_PREFIX):
+    import glob
+    from gcu_logger import LOG_EXT
+    return sorted(glob.glob(os.path.join(directory, f"{prefix}*{LOG_EXT}")), key=os.path.getmtime)
+
+def format_snapshot(path, meta, rec, channels=CHANNELS):
+    i = meta['trigger_index']
+    t = rec['t_mono'] - meta['mono_t0']
+    span = f"{t[0] * 1e3:+.0f}..{t[-1] * 1e3:+.0f} ms" if len(t) else "empty"
+    lines = [f"{os.path.basename(path)}  {meta['condition']}  {len(rec)} frames ({i} before)  {span}"]
+    for ch in channels:
+        col = rec[ch]
+        pre, post = col[:i], col[i:]
+        fmt = lambda c: f"{c.min():9.2f} {c.max():9.2f} {c.mean():9.2f}" if len(c) else " " * 29
+        lines.append(f"  {ch:<5} pre {fmt(pre)}   post {fmt(post)}")
+    for k, name in meta['marks']:
+        lines.append(f"  mark {name} at {t[k] * 1e3:+.1f} ms" if k < len(t) else f"  mark {name}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    ap = argparse.ArgumentParser(description="List or inspect triggered scope snapshots")
+    ap.add_argument('paths', nargs='*', default=["."], help="snapshot files or directories")
+    args = ap.parse_args()
+    for p in args.paths:
+        for path in list_snapshots(p) if os.path.isdir(p) else [p]:
+            try: print(format_snapshot(path, *load_snapshot(path)))
+            except ValueError as e: print(f"{path}: {e}", file=sys.stderr)
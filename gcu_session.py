@@ -0,0 +1,250 @@
+import sys
+import json
+import time
+import signal
+import threading
+import selectors
+from gcu_core import CommsCore, PortLost
+from gcu_stats import STATS
+from gcu_events import EV_SUCCESS, EV_ERROR_ENTER, EV_MISFIRE
+from gcu_protocol import TLM_INDEX
+
+COALESCE_S = 0.002          # minimum spacing between wakeups, so ports that become ready together are read together
+
+class DeviceLink(CommsCore):
+    def __init__(self, name, port, emit_interval=0.030, log_dir=None, tx=True):
+        super().__init__(emit_interval=emit_interval, name=name)
+        self.port_name = port
+        self.tx_enabled = tx
+        self.ser = None
+        self.fd = None
+        self.connected = None
+        self.last = None
+        self.frames = 0
+        self.n_cycles = 0
+        self.n_errors = 0
+        self.n_misfires = 0
+        self.on_batch = None
+        self.logger = None
+        self.event_log = None
+        self.events.subscribe(self.count_events)
+        if log_dir:
+            from gcu_logger import TelemetryLogger
+            from gcu_events import EventLog
+            self.logger = TelemetryLogger(directory=log_dir, prefix=f"log_{name}_")
+            self.event_log = EventLog(log_dir, prefix=f"events_{name}_")
+            self.events.subscribe(self.event_log.write)
+
+    def emit_telemetry(self, batch):
+        self.last = batch.rows[-1]
+        self.frames += len(batch)
+        if self.logger: self.logger.submit(batch)
+        if self.on_batch: self.on_batch(self, batch)
+
+    def emit_connection(self, ok):
+        self.connected = ok
+
+    def count_events(self, events):
+        for ev in events:
+            k = ev.kind
+            if k == EV_SUCCESS: self.n_cycles += ev.new
+            elif k == EV_ERROR_ENTER: self.n_errors += 1
+            elif k == EV_MISFIRE: self.n_misfires += ev.new
+
+    def open(self):
+        try:
+            self.ser = self.open_port()
+        except Exception:
+            self.emit_connection(False)
+            return False
+        if self.logger: self.logger.start()
+        self.running = True
+        self.emit_connection(True)
+        self.begin()
+        return True
+
+    def close(self):
+        if self.running: self.finish(self.ser)
+        self.ser = None
+        if self.logger: self.logger.close()
+        if self.event_log: self.event_log.close()
+
+    def summary(self, now=None):
+        snap = self.link.snapshot(now)
+        row = self.last
+        return {'name': self.name, 'port': self.port_name, 'connected': bool(self.connected), 'up': snap['up'],
+                'health': snap['health'], 'rate': snap['rate'], 'frames': self.frames,
+                'state': row[TLM_INDEX['state']] if row else None, 'mag_rem': row[TLM_INDEX['mag_rem']] if row else None,
+                'curr': row[TLM_INDEX['curr']] if row else None,
+                'cycles': self.n_cycles, 'errors': self.n_errors, 'misfires': self.n_misfires}
+
+# One thread and one selector for every link: the per-device work is decode and logging, the wakeups,
+# TX deadlines and timer checks are shared, so CPU grows with the frame rate rather than the port count.
+class Session:
+    def __init__(self, ports, emit_interval=0.030, log_dir=None, tx=True, names=None, coalesce=COALESCE_S):
+        names = names or [f"dev{i}" for i in range(len(ports))]
+        self.devices = [DeviceLink(name, port, emit_interval, log_dir, tx) for name, port in zip(names, ports)]
+        self.coalesce = coalesce
+        self.running = False
+        self.thread = None
+        self.wakeups = 0
+        self.cpu_s = 0.0
+        self.wall_s = 0.0
+        STATS.gauge('session.wakeups', lambda: self.wakeups, rate=True)
+        STATS.gauge('session.live', lambda: sum(1 for d in self.devices if d.ser is not None))
+        STATS.gauge('session.reconnects', lambda: sum(d.reconnects for d in self.devices))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="gcu-session", daemon=True)
+        self.thread.start()
+        while self.running and any(d.connected is None for d in self.devices): time.sleep(0.005)
+        return [d.name for d in self.devices if d.connected]
+
+    def stop(self):
+        self.running = False
+        if self.thread: self.thread.join()
+        self.thread = None
+
+    def run(self):
+        sel = selectors.DefaultSelector()
+        polled = []
+        def watch(dev):
+            try: dev.fd = sel.register(dev.ser.fileno(), selectors.EVENT_READ, dev).fd
+            except Exception: polled.append(dev)
+        for dev in self.devices:
+            if dev.open(): watch(dev)
+        live = [d for d in self.devices if d.ser is not None]
+        lost = []
+        self.wakeups = 0
+        cpu0, wall0 = time.thread_time(), time.monotonic()
+        ready = ()
+        while self.running and (live or lost):
+            now = time.monotonic()
+            self.wakeups += 1
+            for dev in list(lost):
+                # one non-blocking attempt per device whose backoff has expired; the others keep running
+                if dev.port_event.is_set(): dev.port_event.clear(); dev.backoff.reset(now)
+                ser = dev.try_reopen(now)
+                if ser is None: continue
+                dev.ser = ser
+                lost.remove(dev); live.append(dev)
+                watch(dev)
+            for dev in list(live):
+                try: ok = dev.service(dev.ser, now, dev in ready or dev in polled)
+                except PortLost: ok = None if dev.reconnect else False
+                except Exception: ok = True
+                if ok and dev.running: continue
+                live.remove(dev)
+                if dev in polled: polled.remove(dev)
+                else: sel.unregister(dev.fd)
+                if ok is None:
+                    dev.lose_port(dev.ser, now)
+                    dev.ser = None
+                    lost.append(dev)
+                else: dev.close()
+            if not (live or lost): break
+            deadline = min([dev.next_deadline(now) for dev in live] + [dev.backoff.next_at for dev in lost])
+            for dev in polled:
+                due = getattr(dev.ser, 'next_due', None)
+                if due: deadline = min(deadline, now + (due() or 0.0))
+            floor = now + self.coalesce - time.monotonic()
+            if floor > 0: time.sleep(floor)
+            timeout = max(0.0, deadline - time.monotonic())
+            ready = {key.data for key, _ in sel.select(timeout)}
+        self.cpu_s, self.wall_s = time.thread_time() - cpu0, time.monotonic() - wall0
+        sel.close()
+        for dev in live + lost: dev.close()
+        self.running = False
+
+    def summary(self):
+        now = time.monotonic()
+        return [dev.summary(now) for dev in self.devices]
+
+    def io_stats(self):
+        return {'devices': len(self.devices), 'wakeups': self.wakeups, 'cpu_s': self.cpu_s, 'wall_s': self.wall_s}
+
+def format_overview(rows, state_text=None):
+    lines = [f"{'dev':<8} {'link':>6} {'rate/s':>8} {'state':<12} {'mag':>5} {'curr':>7} {'cycles':>7} {'err':>5} {'misf':>5}"]
+    for r in rows:
+        link = f"{r['health']:.0f}%" if r['up'] else "DOWN" if r['connected'] else "--"
+        st = r['state']
+        st = "" if st is None else (state_text or {}).get(st, str(st))
+        curr = "" if r['curr'] is None else f"{r['curr']:.2f}"
+        lines.append(f"{r['name']:<8} {link:>6} {r['rate']:>8.0f} {st:<12} {r['mag_rem'] if r['mag_rem'] is not None else '':>5} "
+                     f"{curr:>7} {r['cycles']:>7} {r['errors']:>5} {r['misfires']:>5}")
+    return "\n".join(lines)
+
+def bench(counts, rate, duration, coalesce=COALESCE_S):
+    # host-side CPU only: the simulated devices run on their own threads and are not counted
+    port = f"sim:rate={rate}"
+    out = []
+    for n in counts:
+        s = Session([port] * n, log_dir=None, tx=True, coalesce=coalesce)
+        s.start()
+        time.sleep(duration)
+        s.stop()
+        frames = sum(d.frames for d in s.devices)
+        out.append({'devices': n, 'mode': 'session', 'frames_s': frames / s.wall_s, 'cpu_pct': 100 * s.cpu_s / s.wall_s,
+                    'wakeups_s': s.wakeups / s.wall_s})
+        links = [CommsCore(name=f"bench{i}") for i in range(n)]
+        for c in links: c.start_comms(port)
+        time.sleep(duration)
+        for c in links: c.stop_comms()
+        wall = max(c.wall_s for c in links) or 1.0
+        frames = sum(c.decoder.frames for c in links)
+        out.append({'devices': n, 'mode': 'threads', 'frames_s': frames / wall, 'cpu_pct': 100 * sum(c.cpu_s for c in links) / wall,
+                    'wakeups_s': sum(c.wakeups for c in links) / wall})
+    return out
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Monitor several GCU links from one process")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    r = sub.add_parser('run', help="capture every port into its own log and print an overview")
+    r.add_argument('ports', nargs='+', help="serial device, pty:PATH, tcp:HOST:PORT, sim:k=v,... or replay:FILE[@SPEED]")
+    r.add_argument('--log-dir', default=".", help="binary log directory, '' to disable logging")
+    r.add_argument('--no-tx', action='store_true', help="listen only, do not send command frames")
+    r.add_argument('--duration', type=float, default=None, help="stop after this many seconds")
+    r.add_argument('--interval', type=float, default=1.0, help="print the overview every N seconds")
+    b = sub.add_parser('bench', help="compare one shared loop against one thread per link on simulated devices")
+    b.add_argument('--devices', default="1,2,4,8,16", help="comma separated device counts")
+    b.add_argument('--rate', type=float, default=1000.0, help="frames per second per device")
+    b.add_argument('--duration', type=float, default=3.0)
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'bench':
+        rows = bench([int(n) for n in args.devices.split(',')], args.rate, args.duration)
+        base = {r['mode']: r['cpu_pct'] for r in rows if r['devices'] == rows[0]['devices']}
+        print(f"{'devices':>7} {'mode':<8} {'frames/s':>10} {'cpu %':>7} {'x1 dev':>7} {'wakeups/s':>10}", file=sys.stderr)
+        for r in rows:
+            print(f"{r['devices']:>7} {r['mode']:<8} {r['frames_s']:>10.0f} {r['cpu_pct']:>7.1f} "
+                  f"{r['cpu_pct'] / base[r['mode']]:>7.2f} {r['wakeups_s']:>10.0f}", file=sys.stderr)
+        print(json.dumps(rows))
+        return 0
+
+    session = Session(args.ports, log_dir=args.log_dir or None, tx=not args.no_tx)
+    stop = []
+    signal.signal(signal.SIGINT, lambda *_: stop.append(1))
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(1))
+    opened = session.start()
+    for dev in session.devices:
+        if not dev.connected: print(f"could not open {dev.port_name}", file=sys.stderr)
+    if not opened: return 1
+    deadline = time.monotonic() + args.duration if args.duration else float('inf')
+    next_print = time.monotonic() + args.interval
+    while not stop and session.running and time.monotonic() < deadline:
+        time.sleep(0.05)
+        if time.monotonic() >= next_print:
+            print(format_overview(session.summary()) + "\n", file=sys.stderr)
+            next_print += args.interval
+    session.stop()
+    print(format_overview(session.summary()), file=sys.stderr)
+    out = session.io_stats()
+    out['devices'] = [dict(d.summary(), log_files=d.logger.paths if d.logger else [], **d.link_stats())
+                      for d in session.devices]
+    print(json.dumps(out), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
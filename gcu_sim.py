@@ -0,0 +1,149 @@
+import math
+import time
+import random
+import threading
+from gcu_protocol import TLM_HEADER, TLM_FIELDS, PACKET_SIZE, BAUD_RATE, encode_frame
+
+CYCLE = ((1, 40), (3, 15), (4, 10), (5, 15), (2, 30), (6, 8))
+
+class SimulatedDevice:
+    def __init__(self, rate=1000, noise=0.0, drop=0.0, crc_error=0.0, baud=0, seed=None, chunk_s=0.002, fault=0.0):
+        self.rate = float(rate)
+        self.fault = fault
+        self.noise = noise
+        self.drop = drop
+        self.crc_error = crc_error
+        self.baud = int(baud)
+        self.chunk_s = chunk_s
+        self.rng = random.Random(None if seed is None else int(seed))
+        self.seq = 0
+        self.frames = 0
+        self.corrupted = 0
+        self.dropped = 0
+        self.noise_bytes = 0
+        self.bytes_out = 0
+        self.rx_bytes = 0
+        self.running = False
+        self.thread = None
+        self._cycle = [s for s, n in CYCLE for _ in range(n)]
+
+    def values(self, i):
+        cycle, k = divmod(i, len(self._cycle))
+        st = self._cycle[k]
+        ph = i * 0.05
+        # a fault is a deterministic function of the cycle number, so generate() and values() stay reproducible
+        fault = (cycle * 2654435761 % 4096) < self.fault * 4096 and cycle % 3 + 1
+        misfire = 0
+        if fault == 1 and st == 6: misfire = 1
+        elif fault == 2 and st == 6: st = 10
+        elif fault == 3 and st == 4: st = 11
+        row = dict.fromkeys(TLM_FIELDS, 0)
+        row.update(header=TLM_HEADER, state=st, mag_rem=max(0, 999 - cycle),
+                   burst_fired=i & 0xFFFF, curr=(18.0 if st == 10 else 8.0 if st == 6 else 2.0) + 1.5 * math.sin(ph),
+                   lvdt_header=0xAA, t_recv=i * 5, t_chamb=120 + i % 7, timing_sum=450 + i % 11,
+                   p1=int(st in (2, 6)), p2=int(st == 6), success=int(st == 6 and not misfire), misfire=misfire, out=0,
+                   pos=int(32767 + 30000 * math.sin(ph * 0.5)) & 0xFFFF, count_miss=i // 5000,
+                   ack_flags=int(st in (1, 2)))
+        return tuple(row[k] for k in TLM_FIELDS)
+
+    def generate(self, n):
+        out = bytearray()
+        rng = self.rng
+        for _ in range(n):
+            frame = bytearray(encode_frame(self.values(self.seq)))
+            self.seq += 1
+            if self.noise and rng.random() < self.noise:
+                junk = bytes(rng.randrange(256) for _ in range(rng.randrange(1, 17)))
+                out += junk; self.noise_bytes += len(junk)
+            if self.crc_error and rng.random() < self.crc_error:
+                frame[rng.randrange(1, PACKET_SIZE)] ^= 1 << rng.randrange(8); self.corrupted += 1
+            if self.drop and rng.random() < self.drop:
+                del frame[rng.randrange(PACKET_SIZE)]; self.dropped += 1
+            out += frame
+        self.frames += n
+        return bytes(out)
+
+    def start(self, endpoint):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, args=(endpoint,), name="gcu-sim", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread: self.thread.join(1.0)
+
+    def run(self, endpoint, duration=None):
+        t0 = time.monotonic()
+        deadline = t0 + duration if duration else float('inf')
+        sent = 0
+        byte_rate = self.baud / 10.0 if self.baud else 0
+        try:
+            while self.running:
+                now = time.monotonic()
+                if now >= deadline: break
+                due = int((now - t0) * self.rate) - sent
+                if byte_rate: due = min(due, int((now - t0) * byte_rate) // PACKET_SIZE - sent)
+                if due > 0:
+                    data = self.generate(due)
+                    view, done = memoryview(data), 0
+                    while done < len(data) and self.running and time.monotonic() < deadline:
+                        n = endpoint.write(view[done:])
+                        done += n
+                        if not n: time.sleep(0.0005)
+                    self.bytes_out += done
+                    sent += due
+                try:
+                    if endpoint.in_waiting: self.rx_bytes += len(endpoint.read(endpoint.in_waiting))
+                except Exception: pass
+                time.sleep(self.chunk_s)
+        finally:
+            self.running = False
+
+    def stats(self):
+        return {'frames': self.frames, 'corrupted': self.corrupted, 'dropped': self.dropped,
+                'noise_bytes': self.noise_bytes, 'bytes_out': self.bytes_out, 'rx_bytes': self.rx_bytes}
+
+def serve_pty():
+    import os, tty
+    from gcu_transport import FdTransport
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    path = os.ttyname(slave)
+    return path, FdTransport(master, "pty-master"), slave
+
+def serve_tcp(addr):
+    import socket
+    from gcu_transport import SocketTransport
+    host, _, port = addr.rpartition(':')
+    srv = socket.create_server((host or '127.0.0.1', int(port)))
+    conn, peer = srv.accept()
+    srv.close()
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return SocketTransport(conn, f"tcp:{peer}")
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    ap = argparse.ArgumentParser(description="Simulated GCU telemetry source")
+    ap.add_argument('--tcp', default=None, metavar='HOST:PORT', help="serve one tcp: client instead of a pty")
+    ap.add_argument('--rate', type=float, default=1000.0, help="frames per second")
+    ap.add_argument('--baud', type=int, default=0, help=f"cap output to a line rate (e.g. {BAUD_RATE})")
+    ap.add_argument('--noise', type=float, default=0.0)
+    ap.add_argument('--drop', type=float, default=0.0)
+    ap.add_argument('--crc-error', type=float, default=0.0)
+    ap.add_argument('--fault', type=float, default=0.0, help="fraction of cycles with a misfire, over-current or LVDT fault")
+    ap.add_argument('--duration', type=float, default=None)
+    ap.add_argument('--seed', type=int, default=None)
+    args = ap.parse_args()
+    sim = SimulatedDevice(rate=args.rate, noise=args.noise, drop=args.drop, crc_error=args.crc_error,
+                          baud=args.baud, seed=args.seed, fault=args.fault)
+    if args.tcp:
+        print(f"waiting for client on tcp:{args.tcp}", flush=True)
+        ep = serve_tcp(args.tcp)
+    else:
+        path, ep, slave = serve_pty()
+        print(f"simulated device on pty:{path}", flush=True)
+    sim.running = True
+    try: sim.run(ep, args.duration)
+    except KeyboardInterrupt: pass
+    print(json.dumps(sim.stats()))
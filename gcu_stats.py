@@ -0,0 +1,107 @@
+import json
+import time
+
+class Counter:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+class Histogram:
+    __slots__ = ('unit', 'counts', 'n', 'total', 'max')
+
+    def __init__(self, unit=1e-6, buckets=40):
+        self.unit = unit
+        self.counts = [0] * buckets
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, v):
+        b = int(v / self.unit).bit_length()
+        counts = self.counts
+        counts[b if b < len(counts) else -1] += 1
+        self.n += 1
+        self.total += v
+        if v > self.max: self.max = v
+
+    def percentile(self, q):
+        if not self.n: return 0.0
+        rank, seen = q * self.n, 0
+        for b, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank: return min((1 << b) * self.unit, self.max)
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.n, self.total, self.max = 0, 0.0, 0.0
+
+    def snapshot(self):
+        return {'count': self.n, 'mean': self.total / self.n if self.n else 0.0, 'max': self.max,
+                'p50': self.percentile(0.50), 'p90': self.percentile(0.90), 'p99': self.percentile(0.99)}
+
+class Stats:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.rated = set()
+        self.t0 = time.monotonic()
+        self.last_t = self.t0
+        self.last_values = {}
+
+    def counter(self, name):
+        c = self.counters.get(name)
+        if c is None: c = self.counters[name] = Counter()
+        return c
+
+    def histogram(self, name, unit=1e-6):
+        h = self.histograms.get(name)
+        if h is None: h = self.histograms[name] = Histogram(unit)
+        return h
+
+    def gauge(self, name, fn, rate=False):
+        self.gauges[name] = fn
+        if rate: self.rated.add(name)
+        else: self.rated.discard(name)
+
+    def values(self):
+        out = {name: c.value for name, c in self.counters.items()}
+        for name, fn in self.gauges.items():
+            try: out[name] = fn()
+            except Exception: out[name] = None
+        return out
+
+    def snapshot(self):
+        now = time.monotonic()
+        values = self.values()
+        dt = now - self.last_t
+        rates = {}
+        if dt > 0:
+            for name, v in values.items():
+                if name not in self.counters and name not in self.rated: continue
+                prev = self.last_values.get(name)
+                if isinstance(v, (int, float)) and isinstance(prev, (int, float)) and v >= prev:
+                    rates[name] = (v - prev) / dt
+        self.last_t, self.last_values = now, values
+        return {'t': now, 'wall': time.time(), 'uptime': now - self.t0, 'values': values, 'rates': rates,
+                'histograms': {name: h.snapshot() for name, h in self.histograms.items()}}
+
+    def export(self, path, snap=None):
+        with open(path, 'a') as f:
+            f.write(json.dumps(snap or self.snapshot()) + "\n")
+
+def format_snapshot(snap):
+    lines = []
+    for name, v in sorted(snap['values'].items()):
+        rate = snap['rates'].get(name)
+        lines.append(f"{name:<22} {v!s:>12}" + (f" {rate:>10.1f}/s" if rate else ""))
+    for name, h in sorted(snap['histograms'].items()):
+        lines.append(f"{name:<22} p50 {h['p50'] * 1e3:7.2f} p99 {h['p99'] * 1e3:7.2f} max {h['max'] * 1e3:7.2f} ms")
+    return "\n".join(lines)
+
+STATS = Stats()
@@ -0,0 +1,134 @@
+import os
+import socket
+from abc import ABC, abstractmethod
+from gcu_protocol import BAUD_RATE
+from gcu_replay import ReplayPort, parse_replay_spec
+
+class StreamTransport(ABC):
+    def __init__(self, name=""):
+        self.name = name
+        self.buf = bytearray()
+        self.is_open = True
+        self.eof = False
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.tx_dropped = 0
+
+    @abstractmethod
+    def _recv(self, n): ...
+
+    @abstractmethod
+    def _send(self, data): ...
+
+    @abstractmethod
+    def fileno(self): ...
+
+    def _fill(self):
+        if self.eof: return
+        while True:
+            try: chunk = self._recv(65536)
+            except (BlockingIOError, InterruptedError): return
+            if not chunk:
+                self.eof = True
+                raise ConnectionError(f"{self.name}: peer closed")
+            self.buf += chunk
+            self.rx_bytes += len(chunk)
+            if len(chunk) < 65536: return
+
+    @property
+    def in_waiting(self):
+        self._fill()
+        return len(self.buf)
+
+    def read(self, size=1):
+        if len(self.buf) < size: self._fill()
+        data = bytes(self.buf[:size])
+        del self.buf[:size]
+        return data
+
+    def write(self, data):
+        try: n = self._send(data)
+        except (BlockingIOError, InterruptedError): n = 0
+        self.tx_bytes += n
+        if n < len(data): self.tx_dropped += len(data) - n
+        return n
+
+    def close(self):
+        self.is_open = False
+
+class SocketTransport(StreamTransport):
+    def __init__(self, sock, name="socket"):
+        super().__init__(name)
+        sock.setblocking(False)
+        self.sock = sock
+
+    def _recv(self, n): return self.sock.recv(n)
+    def _send(self, data): return self.sock.send(data)
+    def fileno(self): return self.sock.fileno()
+
+    def close(self):
+        if self.is_open: self.sock.close()
+        super().close()
+
+class FdTransport(StreamTransport):
+    def __init__(self, fd, name="fd"):
+        super().__init__(name)
+        os.set_blocking(fd, False)
+        self.fd = fd
+
+    def _recv(self, n): return os.read(self.fd, n)
+    def _send(self, data): return os.write(self.fd, data)
+    def fileno(self): return self.fd
+
+    def close(self):
+        if self.is_open: os.close(self.fd)
+        super().close()
+
+def open_pty(path):
+    import tty
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    tty.setraw(fd)
+    return FdTransport(fd, path)
+
+def open_tcp(addr, timeout=2.0):
+    host, _, port = addr.rpartition(':')
+    sock = socket.create_connection((host or '127.0.0.1', int(port)), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return SocketTransport(sock, f"tcp:{addr}")
+
+def open_pipe():
+    host, dev = socket.socketpair()
+    return SocketTransport(host, "pipe"), SocketTransport(dev, "pipe-device")
+
+def open_sim(opts):
+    from gcu_sim import SimulatedDevice
+    host, dev = open_pipe()
+    kw = {}
+    for item in filter(None, opts.split(',')):
+        k, _, v = item.partition('=')
+        kw[k] = float(v)
+    sim = SimulatedDevice(**kw)
+    sim.start(dev)
+    host.device = sim
+    _close = host.close
+    def close():
+        sim.stop(); _close()
+    host.close = close
+    return host
+
+def open_serial(path, baud=BAUD_RATE):
+    import serial
+    return serial.Serial(path, baud, timeout=0.002, write_timeout=0)
+
+TRANSPORTS = {
+    'replay': lambda arg, baud: ReplayPort(*parse_replay_spec('replay:' + arg)),
+    'pty': lambda arg, baud: open_pty(arg),
+    'tcp': lambda arg, baud: open_tcp(arg),
+    'sim': lambda arg, baud: open_sim(arg),
+    'serial': lambda arg, baud: open_serial(arg, baud),
+}
+
+def open_transport(spec, baud=BAUD_RATE):
+    scheme, sep, arg = spec.partition(':')
+    if sep and scheme in TRANSPORTS: return TRANSPORTS[scheme](arg, baud)
+    return open_serial(spec, baud)
@@ -0,0 +1,283 @@
+import time
+import struct
+import selectors
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from gcu_protocol import REC_HEAD, REC_STRUCT, TLM_CODEC, TX_INTERVAL, FrameDecoder, TelemetryBatch, encode_command
+from gcu_ports import Backoff
+
+RING_MAGIC = b'GCUS'
+RING_VERSION = 1
+HDR_SIZE = 192
+CTL = struct.Struct('<4sIQQ')          # magic, version, capacity, slot size
+CTL_OFF = 0
+HEAD_OFF = 24                          # records ever written
+STATS = struct.Struct('<QQQQQ')        # bytes_in, frames, crc_errors, discarded, tx_frames
+STATS_OFF = 32
+STATE = struct.Struct('<Qd')           # state, last rx (monotonic)
+STATE_OFF = 72
+CMD_SEQ_OFF = 88                       # seqlock: odd while the GUI is writing the command block, even after
+CMD = struct.Struct('<BIIIIBBBBBHBBBQ')  # mode, timings x4, safety, load, fire, manual, burst, ammo, enable, bypass, reset, ammo_seq
+CMD_OFF = 96
+U64 = struct.Struct('<Q')
+assert CMD_OFF + CMD.size <= HDR_SIZE
+
+ST_STARTING, ST_RUNNING, ST_FAILED, ST_STOPPED = range(4)
+
+def _attach(name):
+    try: return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: return shared_memory.SharedMemory(name=name)
+
+class SharedRing:
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        magic, version, self.capacity, self.slot = CTL.unpack_from(self.buf, CTL_OFF)
+        if magic != RING_MAGIC or version != RING_VERSION: raise ValueError("not a GCU telemetry ring")
+        self.data_off = HDR_SIZE
+
+    @classmethod
+    def create(cls, capacity=1 << 16):
+        slot = REC_STRUCT.size
+        shm = shared_memory.SharedMemory(create=True, size=HDR_SIZE + capacity * slot)
+        shm.buf[:HDR_SIZE] = bytes(HDR_SIZE)
+        CTL.pack_into(shm.buf, CTL_OFF, RING_MAGIC, RING_VERSION, capacity, slot)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach(name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return U64.unpack_from(self.buf, HEAD_OFF)[0]
+
+    def push(self, rows, t):
+        head, cap, slot, buf = self.head, self.capacity, self.slot, self.buf
+        pack_into = REC_STRUCT.pack_into
+        for row in rows:
+            pack_into(buf, self.data_off + (head % cap) * slot, t, *row)
+            head += 1
+        U64.pack_into(buf, HEAD_OFF, head)
+
+    def set_stats(self, bytes_in, frames, crc_errors, discarded, tx_frames):
+        STATS.pack_into(self.buf, STATS_OFF, bytes_in, frames, crc_errors, discarded, tx_frames)
+
+    def stats(self):
+        return dict(zip(('bytes_in', 'frames', 'crc_errors', 'discarded', 'tx_frames'), STATS.unpack_from(self.buf, STATS_OFF)))
+
+    def set_state(self, state, last_rx=None):
+        if last_rx is None: last_rx = self.state()[1]
+        STATE.pack_into(self.buf, STATE_OFF, state, last_rx)
+
+    def state(self):
+        return STATE.unpack_from(self.buf, STATE_OFF)
+
+    def write_command(self, fields, ammo_seq):
+        mode, timings, *flags = fields
+        seq = U64.unpack_from(self.buf, CMD_SEQ_OFF)[0]
+        U64.pack_into(self.buf, CMD_SEQ_OFF, seq + 1)
+        CMD.pack_into(self.buf, CMD_OFF, mode, *timings, *flags, ammo_seq)
+        U64.pack_into(self.buf, CMD_SEQ_OFF, seq + 2)
+
+    def read_command(self, tries=1000):
+        # retry until the block was read between two equal, even sequence numbers, so a command never
+        # mixes fields from two GUI writes; None if there is no command yet or the writer never finishes
+        for _ in range(tries):
+            s1 = U64.unpack_from(self.buf, CMD_SEQ_OFF)[0]
+            if not s1: return None
+            if s1 & 1: continue
+            v = CMD.unpack_from(self.buf, CMD_OFF)
+            if U64.unpack_from(self.buf, CMD_SEQ_OFF)[0] == s1: return (v[0], v[1:5]) + v[5:14], v[14]
+        return None
+
+    def reader(self):
+        return RingReader(self)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try: self.shm.unlink()
+            except FileNotFoundError: pass
+
+class RingReader:
+    def __init__(self, ring):
+        self.ring = ring
+        self.tail = ring.head
+        self.overruns = 0
+        self.records = 0
+
+    @property
+    def fill(self):
+        return min(self.ring.head - self.tail, self.ring.capacity)
+
+    @property
+    def fill_ratio(self):
+        return self.fill / self.ring.capacity
+
+    def read_records(self, max_records=None):
+        # structured NumPy views straight over the shared buffer, at most two at the wrap, copied once;
+        # records the worker overwrote while we copied are dropped afterwards and counted as overruns
+        import numpy as np
+        ring = self.ring
+        cap, off = ring.capacity, ring.data_off
+        dt = TLM_CODEC.dtype(REC_HEAD)
+        head = ring.head
+        lost = head - self.tail - cap
+        if lost > 0: self.overruns += lost; self.tail += lost
+        n = max(0, head - self.tail)
+        if max_records: n = min(n, max_records)
+        if not n: return np.empty(0, dt)
+        start = self.tail % cap
+        first = min(n, cap - start)
+        parts = [TLM_CODEC.frombuffer(ring.buf, REC_HEAD, count=cnt, offset=off + a * ring.slot)
+                 for a, cnt in ((start, first), (0, n - first)) if cnt]
+        rec = parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+        del parts
+        stale = ring.head - cap - self.tail
+        if stale > 0:
+            stale = min(stale, n)
+            rec = rec[stale:]
+            self.overruns += stale
+        self.tail += n
+        self.records += len(rec)
+        return rec
+
+    def read(self, max_records=None):
+        rec = self.read_records(max_records)
+        return TelemetryBatch.from_records(rec) if len(rec) else TelemetryBatch()
+
+def open_worker_port(spec, recorder):
+    from gcu_transport import open_transport
+    port = open_transport(spec)
+    if recorder:
+        from gcu_replay import RecordingPort
+        port = RecordingPort(port, recorder)
+    return port
+
+def port_selector(port):
+    try:
+        sel = selectors.DefaultSelector(); sel.register(port.fileno(), selectors.EVENT_READ)
+        return sel
+    except Exception: return None
+
+def reopen_worker_port(port, spec, recorder, stop, dec):
+    # same policy as CommsCore.recover: keep the decoder and recording, retry with backoff until stopped
+    try: (port.port if recorder else port).close()
+    except Exception: pass
+    backoff = Backoff()
+    while not stop.is_set():
+        try: port = open_worker_port(spec, recorder)
+        except Exception:
+            backoff.failed(time.monotonic())
+            stop.wait(backoff.next_at - time.monotonic())
+            continue
+        dec.reset()
+        return port
+    return None
+
+def worker_main(spec, shm_name, stop, record_path=None):
+    ring = SharedRing.attach(shm_name)
+    recorder = None
+    try:
+        if record_path:
+            from gcu_replay import SessionRecorder
+            recorder = SessionRecorder(record_path, {'port': spec})
+        port = open_worker_port(spec, recorder)
+    except Exception:
+        ring.set_state(ST_FAILED, 0.0); ring.close()
+        return
+    dec, seq, tx, ammo_seen, last_tx, last_rx = FrameDecoder(), 0, 0, 0, 0.0, 0.0
+    sel = port_selector(port)
+    ring.set_state(ST_RUNNING, 0.0)
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            if now - last_tx >= TX_INTERVAL:
+                cmd = ring.read_command()
+                if cmd:
+                    fields, ammo_seq = cmd
+                    if ammo_seq == ammo_seen: fields = fields[:7] + (0,) + fields[8:]
+                    ammo_seen = ammo_seq
+                    seq = (seq + 1) & 0xFFFF
+                    try: port.write(encode_command(seq, *fields)); tx += 1
+                    except Exception: pass
+                last_tx = now
+            try:
+                if port.in_waiting:
+                    dec.feed(port.read(port.in_waiting))
+                    rows = dec.decode()
+                    if rows:
+                        ring.push(rows, now); last_rx = now
+                        ring.set_state(ST_RUNNING, last_rx)
+                elif getattr(port, 'eof', False): break
+            except OSError:
+                port = reopen_worker_port(port, spec, recorder, stop, dec)
+                if port is None: break
+                if sel: sel.close()
+                sel = port_selector(port)
+            ring.set_stats(dec.bytes_in, dec.frames, dec.crc_errors, dec.discarded, tx)
+            timeout = max(0.0, last_tx + TX_INTERVAL - time.monotonic())
+            if sel: sel.select(timeout)
+            elif timeout: time.sleep(timeout)
+    finally:
+        ring.set_state(ST_STOPPED, last_rx)
+        if sel: sel.close()
+        try:
+            if port: port.close()
+        except Exception: pass
+        if recorder: recorder.close()
+        ring.close()
+
+class WorkerLink:
+    def __init__(self, spec, capacity=1 << 16, record_path=None):
+        self.ring = SharedRing.create(capacity)
+        # spawn, not fork: the link is started from a comms thread in a process that already runs
+        # GUI, logger and scope threads, and forking that can deadlock on a lock another thread held
+        ctx = mp.get_context('spawn')
+        self.stop_event = ctx.Event()
+        self.proc = ctx.Process(target=worker_main, args=(spec, self.ring.name, self.stop_event, record_path),
+                                name="gcu-worker", daemon=True)
+        self.reader = self.ring.reader()
+        self.ammo_seq = 0
+        self.ammo = 0
+
+    def start(self, timeout=3.0):
+        self.proc.start()
+        t_end = time.monotonic() + timeout
+        while time.monotonic() < t_end and self.proc.is_alive():
+            if self.ring.state()[0] != ST_STARTING: break
+            time.sleep(0.005)
+        return self.ring.state()[0] == ST_RUNNING
+
+    @property
+    def alive(self):
+        return self.proc.is_alive() and self.ring.state()[0] == ST_RUNNING
+
+    @property
+    def last_rx(self):
+        return self.ring.state()[1]
+
+    def send(self, fields, ammo=0):
+        if ammo: self.ammo_seq += 1; self.ammo = ammo
+        self.ring.write_command(fields[:7] + (self.ammo,) + fields[8:], self.ammo_seq)
+
+    def read(self, max_records=None):
+        return self.reader.read(max_records)
+
+    def stats(self):
+        return dict(self.ring.stats(), fill=self.reader.fill, fill_ratio=self.reader.fill_ratio,
+                    overruns=self.reader.overruns, capacity=self.ring.capacity)
+
+    def close(self, timeout=1.0):
+        self.stop_event.set()
+        if self.proc.pid is not None:
+            self.proc.join(timeout)
+            if self.proc.is_alive(): self.proc.terminate(); self.proc.join(timeout)
+        self.ring.close()
@@ -0,0 +1,49 @@
+import random
+import struct
+import pytest
+from gcu_crc import (CRC_CHECK, Crc16, check_frames, crc16, crc16_bitwise, crc16_rows, crc16_table, HQX_OK)
+
+LENGTHS = (0, 1, 2, 66, 70, 257, 1024)
+
+def blobs(seed=1, per_length=50):
+    rng = random.Random(seed)
+    for n in LENGTHS:
+        for _ in range(per_length): yield bytes(rng.getrandbits(8) for _ in range(n))
+
+def test_check_value():
+    assert crc16_bitwise(b"123456789") == CRC_CHECK
+    assert crc16_table(b"123456789") == CRC_CHECK
+    assert crc16(b"123456789") == CRC_CHECK
+
+def test_table_matches_bitwise():
+    for blob in blobs():
+        assert crc16_table(blob) == crc16_bitwise(blob)
+
+def test_hqx_and_fallback_match_bitwise():
+    for blob in blobs(2):
+        ref = crc16_bitwise(blob)
+        assert crc16(blob, use_hqx=False) == ref
+        if HQX_OK: assert crc16(blob, use_hqx=True) == ref
+        assert crc16(list(blob)) == ref
+
+def test_incremental_matches_one_shot():
+    for blob in blobs(3, 10):
+        c = Crc16()
+        for i in range(0, len(blob), 7): c.update(blob[i:i + 7])
+        assert c.value == crc16_bitwise(blob)
+
+@pytest.mark.parametrize('use_hqx', sorted({False, HQX_OK}))
+def test_check_frames_flags_corrupted(use_hqx):
+    rng = random.Random(4)
+    frames = bytearray()
+    for i in range(64):
+        body = b"\x55" + bytes(rng.getrandbits(8) for _ in range(65))
+        frames += body + struct.pack('<H', crc16_bitwise(body) ^ (1 if i % 5 == 0 else 0))
+    offsets = list(range(0, len(frames), 68)) + [len(frames) - 10, -1]
+    assert check_frames(frames, offsets, 68, use_hqx) == [i % 5 != 0 for i in range(64)] + [False, False]
+
+@pytest.mark.parametrize('width', (1, 2, 65, 66))
+def test_rows_match_per_row(width):
+    np = pytest.importorskip('numpy')
+    rows = np.random.default_rng(width).integers(0, 256, (200, width), dtype=np.uint8)
+    assert crc16_rows(rows).tolist() == [crc16_bitwise(r.tobytes()) for r in rows]
@@ -0,0 +1,56 @@
+import random
+import pytest
+from gcu_protocol import (PACKET_SIZE, TLM_FIELDS, TLM_HEADER, TLM_STRUCT, FrameDecoder, decode_frames, encode_frame)
+
+def rand_values(rng, i):
+    return (TLM_HEADER, rng.randrange(14), rng.randrange(256), rng.randrange(1000), i & 0xFFFF,
+            rng.random() * 20.0, *(rng.randrange(1 << 32) for _ in range(4)),
+            rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randrange(256),
+            *(rng.randrange(1 << 32) for _ in range(4)),
+            *(rng.randrange(2) for _ in range(5)), rng.randrange(65536), rng.randrange(65536),
+            rng.randrange(1 << 32), rng.randrange(1 << 32), rng.randrange(65536))
+
+def corrupted_stream(rng, n):
+    # random bit flips, truncated frames and junk runs between frames; returns the frames that survive intact
+    sent, stream = [], bytearray()
+    for i in range(n):
+        vals = rand_values(rng, i)
+        frame = bytearray(encode_frame(vals))
+        kind = rng.random()
+        if kind < 0.1: frame[rng.randrange(1, PACKET_SIZE)] ^= 1 << rng.randrange(8)
+        elif kind < 0.15: del frame[rng.randrange(PACKET_SIZE)]
+        else: sent.append(TLM_STRUCT.unpack(TLM_STRUCT.pack(*vals)))
+        if rng.random() < 0.1:
+            stream += bytes(rng.choice((0x00, 0xFF, 0xA5)) for _ in range(rng.randrange(1, 40)))
+        stream += frame
+    return sent, bytes(stream)
+
+def test_values_match_schema():
+    assert len(rand_values(random.Random(0), 0)) == len(TLM_FIELDS)
+
+@pytest.mark.parametrize('seed', range(20))
+def test_decoder_recovers_every_intact_frame(seed):
+    rng = random.Random(1234 + seed)
+    for trial in range(10):
+        sent, stream = corrupted_stream(rng, rng.randrange(1, 300))
+        dec, got, pos = FrameDecoder(capacity=rng.choice((128, 1024, 65536))), [], 0
+        while pos < len(stream):
+            step = rng.randrange(1, 500)
+            dec.feed(stream[pos:pos + step]); pos += step
+            got.extend(dec.decode())
+        assert got == sent, trial
+        assert dec.bytes_in == len(stream)
+        assert dec.frames * PACKET_SIZE + dec.discarded + dec.pending == dec.bytes_in
+
+def test_decode_frames_drops_corrupted():
+    pytest.importorskip('numpy')
+    rng = random.Random(99)
+    frames, good = [], []
+    for i in range(500):
+        vals = rand_values(rng, i)
+        frame = bytearray(encode_frame(vals))
+        if i % 7 == 0: frame[rng.randrange(1, PACKET_SIZE)] ^= 1 << rng.randrange(8)
+        else: good.append(TLM_STRUCT.unpack(TLM_STRUCT.pack(*vals)))
+        frames.append(bytes(frame))
+    rec = decode_frames(b''.join(frames))
+    assert [tuple(r)[:len(TLM_FIELDS)] for r in rec.tolist()] == good